@@ -0,0 +1,133 @@
+"""feed table and title hash
+
+Revision ID: 10eefa1b9c40
+Revises: 6149e4c617fe
+Create Date: 2026-10-18 09:21:37.904112
+
+"""
+
+import hashlib
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "10eefa1b9c40"
+down_revision: Union[str, None] = "6149e4c617fe"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+item = sa.table(
+    "item",
+    sa.column("id", sa.Integer),
+    sa.column("title", sa.String),
+    sa.column("title_hash", sa.BigInteger),
+)
+
+
+def hash_title(title: str) -> int:
+    # Frozen copy of app.models.hash_title so the backfill never drifts
+    digest = hashlib.blake2b(title.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def backfill_title_hashes(batch_size: int = 10000) -> None:
+    conn = op.get_bind()
+    stmt = (
+        item.update()
+        .where(item.c.id == sa.bindparam("item_id"))
+        .values(title_hash=sa.bindparam("item_title_hash"))
+    )
+    last_id = 0
+    while rows := conn.execute(
+        sa.select(item.c.id, item.c.title)
+        .where(item.c.id > last_id)
+        .order_by(item.c.id)
+        .limit(batch_size)
+    ).all():
+        conn.execute(
+            stmt,
+            [
+                {"item_id": id, "item_title_hash": hash_title(title)}
+                for id, title in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feed",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_feed")),
+        sa.UniqueConstraint("url", name=op.f("uq_feed_url")),
+    )
+    op.execute(
+        "INSERT INTO feed (url, created_at) "
+        "SELECT feed_url, MIN(created_at) FROM item GROUP BY feed_url"
+    )
+    with op.batch_alter_table("item") as batch_op:
+        batch_op.add_column(sa.Column("feed_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("title_hash", sa.BigInteger(), nullable=True))
+    op.execute(
+        "UPDATE item SET feed_id = "
+        "(SELECT feed.id FROM feed WHERE feed.url = item.feed_url)"
+    )
+    backfill_title_hashes()
+    op.drop_index(op.f("ix_item_feed_url_title"), table_name="item")
+    op.drop_index(
+        op.f("ix_item_feed_url_created_at_predicted_label"), table_name="item"
+    )
+    with op.batch_alter_table("item") as batch_op:
+        batch_op.drop_constraint(op.f("uq_item_title_feed_url"), type_="unique")
+        batch_op.alter_column("feed_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column(
+            "title_hash", existing_type=sa.BigInteger(), nullable=False
+        )
+        batch_op.drop_column("feed_url")
+        batch_op.create_foreign_key(
+            op.f("fk_item_feed_id_feed"), "feed", ["feed_id"], ["id"]
+        )
+        batch_op.create_unique_constraint(
+            op.f("uq_item_feed_id_title_hash"), ["feed_id", "title_hash"]
+        )
+    op.create_index(
+        op.f("ix_item_feed_id_created_at_predicted_label"),
+        "item",
+        ["feed_id", "created_at", "predicted_label"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_item_feed_id_created_at_predicted_label"), table_name="item"
+    )
+    with op.batch_alter_table("item") as batch_op:
+        batch_op.add_column(sa.Column("feed_url", sa.String(), nullable=True))
+    op.execute(
+        "UPDATE item SET feed_url = "
+        "(SELECT feed.url FROM feed WHERE feed.id = item.feed_id)"
+    )
+    with op.batch_alter_table("item") as batch_op:
+        batch_op.drop_constraint(op.f("uq_item_feed_id_title_hash"), type_="unique")
+        batch_op.drop_constraint(op.f("fk_item_feed_id_feed"), type_="foreignkey")
+        batch_op.drop_column("title_hash")
+        batch_op.drop_column("feed_id")
+        batch_op.alter_column("feed_url", existing_type=sa.String(), nullable=False)
+        batch_op.create_unique_constraint(
+            op.f("uq_item_title_feed_url"), ["title", "feed_url"]
+        )
+    op.create_index(
+        op.f("ix_item_feed_url_created_at_predicted_label"),
+        "item",
+        ["feed_url", "created_at", "predicted_label"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_item_feed_url_title"), "item", ["feed_url", "title"], unique=False
+    )
+    op.drop_table("feed")
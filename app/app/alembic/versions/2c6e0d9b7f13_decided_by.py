@@ -0,0 +1,32 @@
+"""decided by
+
+Revision ID: 2c6e0d9b7f13
+Revises: 89a2442651bf
+Create Date: 2026-10-18 10:41:09.527130
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2c6e0d9b7f13"
+down_revision: Union[str, None] = "89a2442651bf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("item", "item_archive")
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.add_column(sa.Column("decided_by", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column("decided_by")
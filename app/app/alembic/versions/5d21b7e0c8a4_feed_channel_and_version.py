@@ -0,0 +1,36 @@
+"""feed channel and version
+
+Revision ID: 5d21b7e0c8a4
+Revises: 2c6e0d9b7f13
+Create Date: 2026-10-18 11:52:16.730418
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d21b7e0c8a4"
+down_revision: Union[str, None] = "2c6e0d9b7f13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("feed") as batch_op:
+        batch_op.add_column(sa.Column("title", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("link", sa.String(), nullable=True))
+        batch_op.add_column(sa.Column("description", sa.String(), nullable=True))
+        batch_op.add_column(
+            sa.Column("version", sa.Integer(), server_default="0", nullable=False)
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("feed") as batch_op:
+        batch_op.drop_column("version")
+        batch_op.drop_column("description")
+        batch_op.drop_column("link")
+        batch_op.drop_column("title")
@@ -0,0 +1,32 @@
+"""labeled at
+
+Revision ID: 7a3f9c2e4b61
+Revises: 5d21b7e0c8a4
+Create Date: 2026-10-18 12:40:03.118245
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3f9c2e4b61"
+down_revision: Union[str, None] = "5d21b7e0c8a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("item", "item_archive"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("labeled_at", sa.DateTime(), nullable=True))
+    op.create_index(op.f("ix_item_labeled_at"), "item", ["labeled_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_item_labeled_at"), table_name="item")
+    for table in ("item_archive", "item"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("labeled_at")
@@ -0,0 +1,35 @@
+"""ensemble scores
+
+Revision ID: 89a2442651bf
+Revises: a4017d3fa346
+Create Date: 2026-10-18 10:12:44.213807
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "89a2442651bf"
+down_revision: Union[str, None] = "a4017d3fa346"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("item", "item_archive")
+COLUMNS = ("proba_poor", "proba_average", "proba_good", "margin")
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            for column in COLUMNS:
+                batch_op.add_column(sa.Column(column, sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            for column in COLUMNS:
+                batch_op.drop_column(column)
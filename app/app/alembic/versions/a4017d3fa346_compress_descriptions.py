@@ -0,0 +1,75 @@
+"""compress descriptions
+
+Revision ID: a4017d3fa346
+Revises: 69019e4b4b7b
+Create Date: 2026-10-18 09:46:03.558271
+
+"""
+
+from typing import Callable, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from app.compression import compress, decompress
+
+# revision identifiers, used by Alembic.
+revision: str = "a4017d3fa346"
+down_revision: Union[str, None] = "69019e4b4b7b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("item", "item_archive")
+
+
+def convert(
+    table_name: str,
+    source_type: sa.types.TypeEngine,
+    target_type: sa.types.TypeEngine,
+    transform: Callable,
+    batch_size: int = 1000,
+) -> None:
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.add_column(sa.Column("description_new", target_type, nullable=True))
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.Integer),
+        sa.column("description", source_type),
+        sa.column("description_new", target_type),
+    )
+    conn = op.get_bind()
+    stmt = (
+        table.update()
+        .where(table.c.id == sa.bindparam("row_id"))
+        .values(description_new=sa.bindparam("row_description"))
+    )
+    last_id = 0
+    while rows := conn.execute(
+        sa.select(table.c.id, table.c.description)
+        .where(table.c.id > last_id, table.c.description != None)
+        .order_by(table.c.id)
+        .limit(batch_size)
+    ).all():
+        conn.execute(
+            stmt,
+            [
+                {"row_id": id, "row_description": transform(description)}
+                for id, description in rows
+            ],
+        )
+        last_id = rows[-1].id
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.drop_column("description")
+        batch_op.alter_column(
+            "description_new", new_column_name="description", existing_type=target_type
+        )
+
+
+def upgrade() -> None:
+    for table_name in TABLES:
+        convert(table_name, sa.String(), sa.LargeBinary(), compress)
+
+
+def downgrade() -> None:
+    for table_name in TABLES:
+        convert(table_name, sa.LargeBinary(), sa.String(), decompress)
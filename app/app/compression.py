@@ -0,0 +1,54 @@
+import zlib
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+# Preset dictionaries for zlib, indexed by the version byte that prefixes each
+# compressed value. Fragments that recur across feed descriptions, the most
+# common ones last since zlib favours the end of the dictionary. Never edit an
+# entry in place, append a new version so stored values stay readable.
+DICTIONARIES: list[bytes] = [
+    b"",
+    (
+        b"<figure><figcaption></figcaption></figure><blockquote></blockquote>"
+        b"<ul><li></li></ul><ol></ol><h2></h2><h3></h3><strong></strong><em></em>"
+        b'<span class=""></span><div class=""></div><table><tr><td></td></tr>'
+        b'</table><img alt="" width="" height="" loading="lazy" src="https://'
+        b'<iframe src="https://www.youtube.com/embed/" frameborder="0"></iframe>'
+        b' srcset="" sizes="" />&#8217;s &#8220;&#8221; &#8212; &amp; &quot;'
+        b" &nbsp; &lt;&gt; The post appeared first on Continue reading Read more"
+        b' Comments</a> <a href="https://news.ycombinator.com/item?id='
+        b'Article URL: Comments URL: Points: # Comments: rel="nofollow"'
+        b' target="_blank" The the of and to in a is that for on with as it'
+        b" was by at from this are be an has have said will not which its or"
+        b'<br /><br><p></p><a href="https://www.</a></p>\n<p>'
+    ),
+]
+VERSION = len(DICTIONARIES) - 1
+
+
+def compress(text: str) -> bytes:
+    compressor = zlib.compressobj(level=9, zdict=DICTIONARIES[VERSION] or None)
+    payload = compressor.compress(text.encode("utf-8")) + compressor.flush()
+    return bytes([VERSION]) + payload
+
+
+def decompress(data: bytes) -> str:
+    dictionary = DICTIONARIES[data[0]]
+    decompressor = (
+        zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    )
+    return (decompressor.decompress(data[1:]) + decompressor.flush()).decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored as zlib compressed bytes, transparent to the ORM."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect) -> bytes | None:
+        return compress(value) if value is not None else None
+
+    def process_result_value(self, value: bytes | None, dialect) -> str | None:
+        return decompress(value) if value is not None else None
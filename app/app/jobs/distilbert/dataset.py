@@ -6,7 +6,8 @@ from sklearn.model_selection import train_test_split
 from sqlalchemy import Engine, create_engine
 from transformers import AutoTokenizer
 
-from ...lib.utils import load_config, upsample_dataframe_by_label
+from ...lib.sampling import upsample_dataframe_by_label
+from ...lib.utils import load_config
 
 
 def build_dataset_and_upload(training_input_path: str, test_input_path: str):
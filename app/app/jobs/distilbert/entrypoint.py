@@ -9,6 +9,7 @@ from sagemaker.s3 import S3Downloader
 from app.lib.utils import load_config
 
 from .dataset import build_dataset_and_upload
+from .export import export
 
 
 def main():
@@ -64,3 +65,5 @@ def main():
 
     with tarfile.open("/data/models/distilbert/model.tar.gz", "r") as tar:
         tar.extractall(path="/data/models/distilbert")
+
+    export()
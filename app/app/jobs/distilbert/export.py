@@ -0,0 +1,52 @@
+import tempfile
+from pathlib import Path
+
+import torch
+from loguru import logger
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
+
+from app.lib.distilbert import MODEL_PATH
+from app.lib.distilbert_onnx import ONNX_PATH
+
+
+def export(
+    model_path: str = MODEL_PATH,
+    output_path: str = ONNX_PATH,
+    tokenizer_path: str = "distilbert-base-uncased",
+) -> None:
+    """Export the fine-tuned model as an int8 quantized ONNX graph, together
+    with the tokenizer so the ONNX backend needs nothing from the hub."""
+    model = DistilBertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    tokenizer = DistilBertTokenizerFast.from_pretrained(tokenizer_path)
+    inputs = tokenizer(["Example title"], return_tensors="pt")
+    output = Path(output_path)
+    output.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = f"{tmp}/model.onnx"
+        torch.onnx.export(
+            model,
+            (inputs["input_ids"], inputs["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+        quantize_dynamic(
+            fp32_path, str(output / "model.tmp.onnx"), weight_type=QuantType.QInt8
+        )
+    # Swapped in last so a running classifier never loads a partial graph
+    tokenizer.save_pretrained(output_path)
+    (output / "model.tmp.onnx").replace(output / "model.onnx")
+    logger.info("Exported quantized ONNX model to {}", output_path)
+
+
+def main():
+    export()
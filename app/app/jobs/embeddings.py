@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+from loguru import logger
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sqlalchemy import Engine, create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from ..lib.embedding_head import HEAD_PATH
+from ..lib.embeddings import EmbeddingStore, Encoder
+from ..lib.utils import load_config
+from ..models import Item
+
+config = load_config()
+
+engine: Engine = create_engine(url=config.db_url)
+Session = sessionmaker(bind=engine)
+
+
+def main():
+    try:
+        with Session() as session:
+            stmt = select(Item.id, Item.title, Item.label).where(Item.label != None)
+            ids, titles, labels = zip(*session.execute(stmt).all())
+        encoder = Encoder(config.embeddings)
+        store = EmbeddingStore(config.embeddings.path, encoder.name, encoder.dim)
+        vectors, found = store.get(list(ids))
+        if missing := np.flatnonzero(~found).tolist():
+            # Items from before the store existed, or from a previous encoder
+            logger.info("Encoding {} labeled items without embeddings", len(missing))
+            vectors[missing] = encoder.encode([titles[i] for i in missing])
+            store.put([ids[i] for i in missing], vectors[missing])
+        y = np.array([label.value for label in labels])
+        train_x, test_x, train_y, test_y = train_test_split(
+            vectors, y, test_size=0.1, stratify=y
+        )
+        model = LogisticRegression(class_weight="balanced", max_iter=1000)
+        model.fit(train_x, train_y)
+        score = f1_score(model.predict(test_x), test_y, average="macro")
+        logger.info("F1 Score: {}", score)
+        model.fit(vectors, y)
+        path = Path(HEAD_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, path.with_suffix(".tmp"))
+        path.with_suffix(".tmp").replace(path)
+        logger.info("Fitted embedding head on {} items", len(y))
+    except Exception as e:
+        logger.exception(f"Exception occured: {e}")
@@ -1,24 +1,44 @@
+import asyncio
 import os
-import sys
-from pathlib import Path
-from typing import Any
+import signal
+import threading
+from datetime import timedelta
+from itertools import islice
+from typing import Iterable
 
-import httpx
+import arrow
+import numpy as np
 import pandas as pd
-import xmltodict
 from loguru import logger
 from pandas import DataFrame
 from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from ..lib.classifier import Classifier
-from ..lib.types import Config, FeedConfig, ParsedChannel, ParsedItem
-from ..lib.utils import hash_url, load_config, load_models
+from ..lib.classifier import PROBA_COLUMNS, Classifier, fingerprint
+from ..lib.embeddings import EmbeddingStore, Encoder
+from ..lib.fetch import FetchResult, fetch_feeds
+from ..lib.registry import (
+    artifacts_fingerprint,
+    load_model,
+    load_models,
+    prediction_cache,
+)
+from ..lib.render import FEEDS_PATH, feed_items, write_feed
+from ..lib.schedule import is_due, next_poll_at
+from ..lib.types import CascadeConfig, Config, FeedConfig, ParsedChannel, ParsedItem
+from ..lib.utils import hash_url, load_config
 from ..models import (
-    Item,
+    FetchState,
     Label,
-    get_item_by_feed_url_and_title,
-    get_past_two_weeks_items_by_feed_url,
+    bump_feed_versions,
+    get_existing_titles,
+    get_fetch_states,
+    get_or_create_feed_id,
+    get_publish_times,
+    get_titles_by_ids,
+    hash_title,
+    insert_items,
+    set_feed_channel,
 )
 
 config = load_config()
@@ -27,142 +47,474 @@ SessionFactory = sessionmaker(bind=engine)
 
 
 def construct_dataframe(
-    feed_config: FeedConfig, items: list[ParsedItem], session: Session
+    feed_id: int,
+    items: Iterable[ParsedItem],
+    session: Session,
+    stop_after_seen: int,
+    chunk_size: int = 20,
 ) -> pd.DataFrame:
-    df = pd.DataFrame([dict(item) for item in items])
-    df = df.drop_duplicates(
-        subset=["title"]
-    )  # Have seen some feeds accidentally double post
-    if df.empty:
-        return df
-    mask = df.apply(
-        lambda row: get_item_by_feed_url_and_title(
-            session, feed_config.url, row.get("title", "")
+    """Collect the items not stored yet, newest first.
+
+    Items are checked against the database a chunk at a time, and since feeds
+    list their newest entries first consumption stops after `stop_after_seen`
+    consecutive items that are already stored.
+    """
+    frames: list[DataFrame] = []
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        chunk_df = pd.DataFrame([dict(item) for item in chunk])
+        existing = get_existing_titles(session, feed_id, chunk_df["title"].tolist())
+        chunk_df["seen"] = chunk_df["title"].isin(existing)
+        frames.append(chunk_df)
+        df = pd.concat(frames, ignore_index=True).drop_duplicates(
+            subset=["title"], ignore_index=True
+        )  # Have seen some feeds accidentally double post
+        seen_run = (
+            df["seen"].astype(int).rolling(stop_after_seen).sum() >= stop_after_seen
         )
-        is None,
-        axis=1,
-    )
-    return df[mask].reset_index(drop=True)
+        if seen_run.any():
+            frames = [df.iloc[: seen_run.idxmax()]]
+            break
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True).drop_duplicates(subset=["title"])
+    return df[~df["seen"]].drop(columns="seen").reset_index(drop=True)
 
 
 def add_predictions(
     df: DataFrame,
     models: list[Classifier],
+    cascade: CascadeConfig = CascadeConfig(),
 ) -> DataFrame:
-    columns = ["poor", "average", "good"]
-    scores = pd.DataFrame([[0, 0, 0] for _ in range(df.shape[0])], columns=columns)
-    for model in models:
-        proba_df = model.run(df)
-        for col in columns:
-            scores[col] += proba_df[col] * model.weight
-    df["predicted_label"] = scores.apply(lambda row: Label(row.argmax()), axis=1)
+    # Weighted sum of label probabilities over the models that ran on each
+    # item. In cascade mode models run from cheapest to most expensive and
+    # an item leaves once its margin reaches the threshold.
+    threshold = cascade.threshold if cascade.active else np.inf
+    totals = np.zeros((df.shape[0], len(PROBA_COLUMNS)))
+    weights = np.zeros(df.shape[0])
+    decided_by = np.full(df.shape[0], None, dtype=object)
+    pending = np.arange(df.shape[0])
+    for model in sorted(models, key=lambda model: model.cost):
+        proba = model.run(df.iloc[pending].reset_index(drop=True))
+        totals[pending] += model.weight * proba[PROBA_COLUMNS].to_numpy()
+        weights[pending] += model.weight
+        decided_by[pending] = model.name
+        ranked = np.sort(totals[pending] / weights[pending, None], axis=1)
+        pending = pending[ranked[:, -1] - ranked[:, -2] < threshold]
+        if not pending.size:
+            break
+    proba = totals / weights[:, None]
+    ranked = np.sort(proba, axis=1)
+    df[PROBA_COLUMNS] = proba
+    df["margin"] = ranked[:, -1] - ranked[:, -2]
+    df["predicted_label"] = np.array(list(Label), dtype=object)[proba.argmax(axis=1)]
+    df["decided_by"] = decided_by
+    if cascade.active:
+        logger.info(
+            "Cascade decided {}",
+            pd.Series(decided_by).value_counts().to_dict(),
+        )
     return df
 
 
-def commit_items(df: DataFrame, feed_config: FeedConfig, session: Session) -> None:
-    for _, row in df.iterrows():
-        try:
-            item = Item(
-                feed_url=feed_config.url,
-                title=row["title"],
-                link=row["link"],
-                predicted_label=row.get("predicted_label"),
-                label=None,
-                description=row.get("description"),
-                author=row.get("author"),
-                category=row.get("category"),
-                comments=row.get("comments"),
-                enclosure=row.get("enclosure"),
-                guid=row.get("guid"),
-                pubDate=row.get("pubDate"),
-            )
-            session.add(item)
-            session.commit()
-        except Exception as e:
-            logger.exception(f"Error while adding item {row.get('title')}: {e}")
-            session.rollback()
-            sys.exit(1)
+def commit_items(
+    df: DataFrame, feed_config: FeedConfig, feed_id: int, session: Session
+) -> list[int]:
+    rows = [
+        {
+            "feed_id": feed_id,
+            "title_hash": hash_title(row["title"]),
+            "title": row["title"],
+            "link": row["link"],
+            "predicted_label": row.get("predicted_label"),
+            "proba_poor": row.get("proba_poor"),
+            "proba_average": row.get("proba_average"),
+            "proba_good": row.get("proba_good"),
+            "margin": row.get("margin"),
+            "decided_by": row.get("decided_by"),
+            "label": None,
+            "description": row.get("description"),
+            "author": row.get("author"),
+            "category": row.get("category"),
+            "comments": row.get("comments"),
+            "enclosure": row.get("enclosure"),
+            "guid": row.get("guid"),
+            "pubDate": row.get("pubDate"),
+        }
+        for row in df.to_dict("records")
+    ]
+    ids = insert_items(session, rows)
+    if ids:
+        bump_feed_versions(session, [feed_id])
+    session.commit()
+    logger.info("Inserted {} of {} items for {}", len(ids), len(rows), feed_config.url)
+    return ids
 
 
 def update_feed(
-    config: Config, feed_config: FeedConfig, channel: ParsedChannel, session: Session
+    config: Config,
+    feed_config: FeedConfig,
+    feed_id: int,
+    channel: ParsedChannel,
+    session: Session,
 ):
+    set_feed_channel(session, feed_id, channel)
+    session.commit()
+    path = FEEDS_PATH / hash_url(feed_config.url) / "feed.xml"
+    if write_feed(path, channel, feed_items(session, config, feed_config, feed_id)):
+        logger.info("Wrote {}", path)
+    else:
+        logger.info("{} is unchanged", path)
+
+
+def save_fetch_state(config: Config, result: FetchResult, session: Session) -> None:
+    feed_hash = hash_url(result.feed.url)
+    state = session.get(FetchState, feed_hash) or FetchState(feed_hash=feed_hash)
+    now = arrow.utcnow().naive
+    if result.failed:
+        delay = timedelta(minutes=config.schedule.default_interval)
+        if result.retry_after:
+            delay = max(delay, timedelta(seconds=result.retry_after))
+        state.next_due_at = now + delay
+    else:
+        state.etag = result.etag
+        state.last_modified = result.last_modified
+        state.digest = result.digest
+        if result.parser:
+            state.ttl = result.parser.ttl
+            state.skip_hours = (
+                ",".join(map(str, sorted(result.parser.skip_hours))) or None
+            )
+        publish_times = get_publish_times(
+            session,
+            get_or_create_feed_id(session, result.feed.url),
+            now - timedelta(days=config.schedule.lookback_days),
+        )
+        state.next_due_at = next_poll_at(
+            now,
+            publish_times,
+            config.schedule,
+            ttl=state.ttl,
+            skip_hours={
+                int(hour) for hour in (state.skip_hours or "").split(",") if hour
+            },
+            retry_after=result.retry_after,
+        )
+    session.add(state)
+    session.commit()
+    logger.info("Next poll of {} at {}", result.feed.url, state.next_due_at)
+
+
+def prepare_feed(config: Config, result: FetchResult) -> DataFrame:
+    with SessionFactory() as session:
+        feed_id = get_or_create_feed_id(session, result.feed.url)
+        session.commit()
+        return construct_dataframe(
+            feed_id=feed_id,
+            items=result.parser.items(),
+            session=session,
+            stop_after_seen=config.fetch.stop_after_seen,
+        )
+
+
+def score_batch(
+    config: Config,
+    models: list[Classifier] | None,
+    encoder: Encoder | None,
+    batch: list[tuple[FetchResult, DataFrame]],
+) -> list[tuple[FetchResult, DataFrame]]:
+    """Run the encoder and classifiers once over the new items of several
+    feeds and split the scored rows back per feed."""
+    df = pd.concat([df for _, df in batch], ignore_index=True)
+    if encoder:
+        df["embedding"] = list(encoder.encode(df["title"].tolist()))
+    if models:
+        df = add_predictions(df, models, config.cascade)
+    logger.info("Scored {} items from {} feeds", df.shape[0], len(batch))
+    bounds = np.cumsum([0] + [feed_df.shape[0] for _, feed_df in batch])
+    return [
+        (result, df.iloc[start:end].reset_index(drop=True))
+        for (result, _), start, end in zip(batch, bounds[:-1], bounds[1:])
+    ]
+
+
+def score_feeds(
+    config: Config,
+    models: list[Classifier] | None,
+    encoder: Encoder | None,
+    batch: list[tuple[FetchResult, DataFrame]],
+) -> list[tuple[FetchResult, DataFrame]]:
+    """`score_batch`, retried one feed at a time when the batch fails so a
+    feed or model that cannot be scored does not hold back the others. Feeds
+    that still fail are left out, so neither their items nor their fetch state
+    are saved and the next tick fetches and scores them again."""
+    try:
+        return score_batch(config, models, encoder, batch)
+    except Exception as e:
+        logger.exception("Error while scoring {} feeds: {}", len(batch), e)
+    if len(batch) == 1:
+        return []
+    scored = []
+    for entry in batch:
+        try:
+            scored.extend(score_batch(config, models, encoder, [entry]))
+        except Exception as e:
+            logger.exception("Skipping {} until next run: {}", entry[0].feed.url, e)
+    return scored
+
 
-    filter = feed_config.filter
-    if filter is None:
-        filter = not config.cold_start
+def finish_feed(
+    config: Config,
+    result: FetchResult,
+    df: DataFrame | None,
+    store: EmbeddingStore | None,
+) -> None:
+    with SessionFactory() as session:
+        try:
+            if df is not None:
+                generate_feed(config, result, df, session, store)
+            save_fetch_state(config, result, session)
+        except Exception as e:
+            logger.exception("Error while generating {}: {}", result.feed.url, e)
+            session.rollback()
+
+
+def generate_feed(
+    config: Config,
+    result: FetchResult,
+    df: DataFrame,
+    session: Session,
+    store: EmbeddingStore | None = None,
+) -> None:
+    feed_config, channel = result.feed, result.channel
+    if df.empty:
+        logger.info("No new entries for {}", channel.title)
+        return
+    feed_id = get_or_create_feed_id(session, feed_config.url)
+    logger.info("{} - First Row: {}", channel.title, df.iloc[0, :])
+    ids = commit_items(df=df, feed_config=feed_config, feed_id=feed_id, session=session)
+    if store and ids and "embedding" in df:
+        embeddings = dict(zip(df["title"], df["embedding"]))
+        titles = get_titles_by_ids(session, ids)
+        store.put(
+            list(titles), np.stack([embeddings[title] for title in titles.values()])
+        )
+    update_feed(
+        config=config,
+        feed_config=feed_config,
+        feed_id=feed_id,
+        channel=channel,
+        session=session or True,
+    )
+    logger.info("Done generating {}", feed_config.url)
 
-    xml_dict: dict[str, Any] = {"rss": {"@version": "2.0"}}
-    xml_dict["rss"]["channel"] = dict(channel)
-    xml_dict["rss"]["channel"]["item"] = []
-    xml_items = xml_dict["rss"]["channel"]["item"]
 
-    items = get_past_two_weeks_items_by_feed_url(
-        session, feed_config.url, [Label.AVERAGE, Label.GOOD] if filter else []
+def load_resources(
+    config: Config,
+) -> tuple[dict[str, Classifier], Encoder | None, EmbeddingStore | None]:
+    models = load_models(config) if not config.cold_start else {}
+    encoder = Encoder(config.embeddings) if config.embeddings.active else None
+    store = (
+        EmbeddingStore(config.embeddings.path, encoder.name, encoder.dim)
+        if encoder
+        else None
     )
+    return models, encoder, store
+
+
+class WarmResources:
+    """Classifiers and encoder kept loaded across daemon ticks.
+
+    Everything is reloaded when the model settings change, and a single
+    classifier when the fingerprint of its own artifacts does, so retraining
+    one model leaves the others loaded. A change has to be seen on two
+    consecutive ticks first, so a training job still writing its artifacts is
+    never picked up halfway. Models are fully loaded before they replace the
+    old ones.
+    """
+
+    SETTINGS = ""
+
+    def __init__(self) -> None:
+        self.keys: dict[str, str] = {}
+        self.pending: dict[str, str] = {}
+        self.classifiers: dict[str, Classifier] = {}
+        self.encoder, self.store = None, None
+
+    @property
+    def models(self) -> list[Classifier]:
+        return list(self.classifiers.values())
+
+    def keys_of(self, config: Config) -> dict[str, str]:
+        settings = config.model_dump_json(
+            include={"classifiers", "embeddings", "prediction_cache", "cold_start"}
+        )
+        if config.embeddings.active:
+            settings += fingerprint(config.embeddings.model)
+        keys = {self.SETTINGS: settings}
+        # Classifiers are only added or removed through the settings
+        for name in self.classifiers:
+            if name in config.classifiers:
+                keys[name] = artifacts_fingerprint(name, config.classifiers[name])
+        return keys
+
+    def refresh(self, config: Config) -> None:
+        keys = self.keys_of(config)
+        changed = {
+            name: key for name, key in keys.items() if self.keys.get(name) != key
+        }
+        if not changed:
+            self.pending = {}
+            return
+        if self.keys and changed != self.pending:
+            self.pending = changed
+            return
+        if not self.keys or self.SETTINGS in changed:
+            logger.info("Loading models")
+            self.classifiers, self.encoder, self.store = load_resources(config)
+            # Now covering the classifiers just loaded
+            keys = self.keys_of(config)
+        else:
+            cache = prediction_cache(config)
+            for name in changed:
+                logger.info("Reloading classifier {}", name)
+                cfg = config.classifiers[name]
+                self.classifiers[name] = load_model(name, cfg, cache)
+        self.keys, self.pending = keys, {}
+
+
+def get_due_feeds(config: Config) -> tuple[list[FeedConfig], dict[str, FetchState]]:
+    now = arrow.utcnow().naive
+    with SessionFactory() as session:
+        states = get_fetch_states(session)
+    due = [
+        feed
+        for feed in config.feeds
+        if is_due(getattr(states.get(hash_url(feed.url)), "next_due_at", None), now)
+    ]
+    return due, states
 
-    for item in items:
-        parsed_item = ParsedItem(**item.__dict__)
-        parsed_item.link = f"{config.host}/update/{item.id}/1"
-        emphasize = f"<a href='{config.host}/update/{item.id}/2'>&#11088; Click To Emphasize</a>"
-        deemphasize = f"<a href='{config.host}/update/{item.id}/0'>&#128308; Click To De-emphasize</a>"
-        parsed_item.description = (
-            f"<p>{emphasize} || {deemphasize}</p><br>{item.description}"
+
+async def pipeline(
+    config: Config,
+    due: list[FeedConfig],
+    states: dict[str, FetchState],
+    models: list[Classifier] | None,
+    encoder: Encoder | None,
+    store: EmbeddingStore | None,
+) -> None:
+    """Fetch, prepare, score and commit feeds as concurrent stages.
+
+    Stages are connected by bounded queues and end with a None sentinel.
+    Feeds are fetched concurrently and deduplicated as they arrive. New items
+    of all feeds are pooled for inference, which runs once `batch_size` rows
+    are pending, `flush_interval` seconds after the first pending feed
+    arrived, or when fetching is done. Scored feeds are committed one at a
+    time. Blocking database and inference work runs in threads so fetching
+    carries on meanwhile.
+    """
+    settings = config.pipeline
+    fetched: asyncio.Queue = asyncio.Queue(settings.queue_size)
+    prepared: asyncio.Queue = asyncio.Queue(settings.queue_size)
+    scored: asyncio.Queue = asyncio.Queue(settings.queue_size)
+    loop = asyncio.get_running_loop()
+
+    async def fetch():
+        await fetch_feeds(
+            due,
+            {
+                feed.url: states[hash_url(feed.url)]
+                for feed in due
+                if hash_url(feed.url) in states
+            },
+            config.fetch,
+            fetched,
         )
-        if item.predicted_label is Label.GOOD:
-            parsed_item.title = f"&#11088; | {parsed_item.title}"
-        elif item.predicted_label is Label.AVERAGE:
-            parsed_item.title = f"&#128309; | {parsed_item.title}"
-        elif item.predicted_label is Label.POOR:
-            parsed_item.title = f"&#128308; | {parsed_item.title}"
-        xml_items.append(dict(parsed_item))
+        await fetched.put(None)
+
+    async def prepare():
+        while (result := await fetched.get()) is not None:
+            if not result.parser:
+                await scored.put((result, None))
+                continue
+            try:
+                df = await asyncio.to_thread(prepare_feed, config, result)
+            except Exception as e:
+                logger.exception("Error while preparing {}: {}", result.feed.url, e)
+                continue
+            await (prepared if not df.empty else scored).put((result, df))
+        await prepared.put(None)
+
+    async def score():
+        batch: list[tuple[FetchResult, DataFrame]] = []
+        deadline = 0.0
+        while True:
+            try:
+                timeout = max(deadline - loop.time(), 0) if batch else None
+                entry = await asyncio.wait_for(prepared.get(), timeout)
+            except TimeoutError:
+                entry = ()
+            if entry:
+                if not batch:
+                    deadline = loop.time() + settings.flush_interval
+                batch.append(entry)
+            pending = sum(df.shape[0] for _, df in batch)
+            if batch and (not entry or pending >= settings.batch_size):
+                batch = await asyncio.to_thread(
+                    score_feeds, config, models, encoder, batch
+                )
+                for scored_entry in batch:
+                    await scored.put(scored_entry)
+                batch = []
+            if entry is None:
+                await scored.put(None)
+                return
+
+    async def commit():
+        while (entry := await scored.get()) is not None:
+            await asyncio.to_thread(finish_feed, config, *entry, store)
+
+    await asyncio.gather(fetch(), prepare(), score(), commit())
+
 
-    path = Path("/data/feeds") / hash_url(feed_config.url)
-    path.mkdir(parents=True, exist_ok=True)
-    with open(file=path / "feed.xml", mode="wb") as file:
-        logger.info("Writing {} items to {}", len(items), path / "feed.xml")
-        xmltodict.unparse(xml_dict, output=file, pretty=True)
+def run(
+    config: Config,
+    due: list[FeedConfig],
+    states: dict[str, FetchState],
+    models: list[Classifier] | None,
+    encoder: Encoder | None,
+    store: EmbeddingStore | None,
+) -> None:
+    asyncio.run(pipeline(config, due, states, models, encoder, store))
 
 
 def main():
     logger.info("Starting generation job...")
     config = load_config()
-    models = load_models(config) if not config.cold_start else None
-    for feed_config in config.feeds:
+    due, states = get_due_feeds(config)
+    if not due:
+        logger.info("No feeds due")
+        return
+    models, encoder, store = load_resources(config)
+    run(config, due, states, list(models.values()), encoder, store)
+    logger.info("Generation job completed")
+
+
+def daemon():
+    logger.info("Starting generation daemon...")
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    warm = WarmResources()
+    while not stop.is_set():
+        config = load_config()
         try:
-            r = httpx.get(feed_config.url, follow_redirects=True)
-            xml_dict = xmltodict.parse(r.text)
-            channel = ParsedChannel(**xml_dict["rss"]["channel"])
-            items = [
-                ParsedItem(**entry) for entry in xml_dict["rss"]["channel"]["item"]
-            ]
-            logger.info("Successfully parsed {}", channel.title)
+            warm.refresh(config)
+            due, states = get_due_feeds(config)
+            if due:
+                run(config, due, states, warm.models, warm.encoder, warm.store)
+                logger.info("Generated {} due feeds", len(due))
         except Exception as e:
-            logger.exception("Failed parsing {}: {}", feed_config.url, e)
-            continue
-        if not items:
-            logger.info("No entries for {}", channel.title)
-            continue
-        with SessionFactory() as session:
-            try:
-                df = construct_dataframe(
-                    feed_config=feed_config, items=items, session=session
-                )
-                if df.empty:
-                    logger.info("No new entries for {}", channel.title)
-                    continue
-                if models:
-                    df = add_predictions(df, models)
-                logger.info("{} - First Row: {}", channel.title, df.iloc[0, :])
-                commit_items(df=df, feed_config=feed_config, session=session)
-                update_feed(
-                    config=config,
-                    feed_config=feed_config,
-                    channel=channel,
-                    session=session or True,
-                )
-                logger.info("Done generating {}", feed_config.url)
-            except Exception as e:
-                logger.exception("Error while generating {}: {}", channel.title, e)
-                session.rollback()
-    logger.info("Generation job completed")
+            logger.exception("Error in generation daemon: {}", e)
+        stop.wait(config.daemon.interval)
+    logger.info("Generation daemon stopped")
@@ -0,0 +1,43 @@
+import arrow
+from loguru import logger
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..lib.utils import load_config
+from ..models import archive_unlabeled_items, drop_unlabeled_descriptions
+
+config = load_config()
+
+engine: Engine = create_engine(url=config.db_url)
+Session = sessionmaker(bind=engine)
+
+
+def optimize(engine: Engine) -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        match engine.dialect.name:
+            case "sqlite":
+                conn.exec_driver_sql("ANALYZE")
+                conn.exec_driver_sql("VACUUM")
+            case "postgresql":
+                conn.exec_driver_sql("VACUUM ANALYZE")
+            case dialect:
+                logger.warning("No optimization for dialect {}", dialect)
+
+
+def main():
+    logger.info("Starting maintenance job...")
+    cfg = config.maintenance
+    before = arrow.utcnow().shift(days=-cfg.retention_days).naive
+    try:
+        with Session() as session:
+            if cfg.archive:
+                count = archive_unlabeled_items(session, before)
+                logger.info("Archived {} items created before {}", count, before)
+            else:
+                count = drop_unlabeled_descriptions(session, before)
+                logger.info("Dropped {} descriptions created before {}", count, before)
+            session.commit()
+        optimize(engine)
+        logger.info("Maintenance job completed")
+    except Exception as e:
+        logger.exception(f"Exception occured: {e}")
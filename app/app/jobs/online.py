@@ -0,0 +1,99 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+from loguru import logger
+from sqlalchemy import Engine, and_, create_engine, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from ..lib.online import ONLINE_PATH, Checkpoint
+from ..lib.utils import load_config
+from ..models import Item
+
+config = load_config()
+
+engine: Engine = create_engine(url=config.db_url)
+Session = sessionmaker(bind=engine)
+
+
+def save(checkpoint: Checkpoint) -> None:
+    path = Path(ONLINE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(checkpoint, path.with_suffix(".tmp"))
+    path.with_suffix(".tmp").replace(path)
+
+
+def update(checkpoint: Checkpoint) -> int:
+    """Learn the labels set since the checkpoint's cursor, oldest first, so
+    each run costs O(new labels) rather than a refit over all of them."""
+    conditions = [Item.label != None, Item.labeled_at != None]
+    if checkpoint.cursor is not None:
+        labeled_at, id = checkpoint.cursor
+        conditions.append(
+            or_(
+                Item.labeled_at > labeled_at,
+                and_(Item.labeled_at == labeled_at, Item.id > id),
+            )
+        )
+    stmt = (
+        select(Item.id, Item.title, Item.label, Item.labeled_at)
+        .where(*conditions)
+        .order_by(Item.labeled_at, Item.id)
+        .execution_options(yield_per=config.online.batch_size)
+    )
+    learned = 0
+    with Session() as session:
+        for rows in session.execute(stmt).partitions():
+            checkpoint.partial_fit(
+                [row.title for row in rows], np.array([row.label.value for row in rows])
+            )
+            checkpoint.cursor = (rows[-1].labeled_at, rows[-1].id)
+            learned += len(rows)
+    return learned
+
+
+def refit() -> None:
+    """Fit a new checkpoint on every label, shuffled, over several epochs."""
+    try:
+        with Session() as session:
+            stmt = select(Item.title, Item.label, Item.labeled_at, Item.id).where(
+                Item.label != None
+            )
+            rows = session.execute(stmt).all()
+        if not rows:
+            # An unfitted checkpoint would load and then fail every prediction
+            logger.info("No labels to fit the online classifier on")
+            return
+        checkpoint = Checkpoint.new()
+        titles = np.array([row.title for row in rows], dtype=object)
+        labels = np.array([row.label.value for row in rows])
+        batch_size = config.online.batch_size
+        rng = np.random.default_rng()
+        for _ in range(config.online.refit_epochs):
+            checkpoint.counts[:] = 0
+            order = rng.permutation(len(rows))
+            for i in range(0, len(order), batch_size):
+                batch = order[i : i + batch_size]
+                checkpoint.partial_fit(titles[batch].tolist(), labels[batch])
+        # Labels from before labeled_at was recorded are only seen by refits
+        stamped = [row for row in rows if row.labeled_at is not None]
+        if stamped:
+            last = max(stamped, key=lambda row: (row.labeled_at, row.id))
+            checkpoint.cursor = (last.labeled_at, last.id)
+        save(checkpoint)
+        logger.info("Refit online classifier on {} labels", len(rows))
+    except Exception as e:
+        logger.exception(f"Exception occured: {e}")
+
+
+def main():
+    try:
+        if not Path(ONLINE_PATH).exists():
+            logger.info("No online classifier checkpoint, refitting")
+            return refit()
+        checkpoint: Checkpoint = joblib.load(ONLINE_PATH)
+        if learned := update(checkpoint):
+            save(checkpoint)
+        logger.info("Online classifier learned {} new labels", learned)
+    except Exception as e:
+        logger.exception(f"Exception occured: {e}")
@@ -13,7 +13,8 @@ from sklearn.pipeline import Pipeline
 from sqlalchemy import Engine, create_engine, select
 from sqlalchemy.orm import sessionmaker
 
-from ..lib.utils import load_config, upsample_dataframe_by_label
+from ..lib.sampling import upsample_dataframe_by_label
+from ..lib.utils import load_config
 from ..models import Item
 
 config = load_config()
@@ -25,15 +26,14 @@ Session = sessionmaker(bind=engine)
 def main():
     try:
         with Session() as session:
-            stmt = select(Item).where(Item.label != None)
-            items = session.scalars(stmt).all()
+            stmt = select(Item.title, Item.label).where(Item.label != None)
             df = pd.DataFrame(
                 [
                     {
-                        "title": item.title,
-                        "label": item.label.value,
+                        "title": title,
+                        "label": label.value,
                     }
-                    for item in items
+                    for title, label in session.execute(stmt)
                 ]
             )
         pipeline = Pipeline(
@@ -57,7 +57,9 @@ def main():
         logger.info("F1 Score: {}", score)
         path = Path("/data/models")
         path.mkdir(parents=True, exist_ok=True)
-        joblib.dump(model, path / "tf-idf-logistic.joblib")
+        # Renamed into place so a running daemon never loads a partial file
+        joblib.dump(model, path / "tf-idf-logistic.tmp")
+        (path / "tf-idf-logistic.tmp").replace(path / "tf-idf-logistic.joblib")
         logger.info("Fitted TFIDF pipeline")
     except Exception as e:
         logger.exception(f"Exception occured: {e}")
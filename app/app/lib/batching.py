@@ -0,0 +1,28 @@
+from typing import Iterator
+
+import numpy as np
+
+
+def length_sorted_batches(
+    tokenizer, titles: list[str], batch_size: int, return_tensors: str
+) -> Iterator[tuple[np.ndarray, dict]]:
+    """Tokenize `titles` and yield (indices, padded inputs) batches.
+
+    Sorting by token length keeps the padding within each batch minimal, the
+    indices map each row of a batch back to its position in `titles`.
+    """
+    encodings = tokenizer(titles, truncation=True)
+    order = np.argsort([len(ids) for ids in encodings["input_ids"]], kind="stable")
+    for start in range(0, len(order), batch_size):
+        batch = order[start : start + batch_size]
+        inputs = tokenizer.pad(
+            [
+                {
+                    "input_ids": encodings["input_ids"][i],
+                    "attention_mask": encodings["attention_mask"][i],
+                }
+                for i in batch
+            ],
+            return_tensors=return_tensors,
+        )
+        yield batch, inputs
@@ -0,0 +1,131 @@
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+from pandas import DataFrame
+
+from ..models import hash_title
+from .classifier import PROBA_COLUMNS, Classifier
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.casefold().split())
+
+
+class PredictionCache:
+    """On-disk LRU of classifier outputs in a SQLite file.
+
+    Entries are keyed by classifier name, the fingerprint of its model
+    artifacts and the hash of the normalized title, so a retrained model
+    never reads a stale entry and `invalidate` drops the old ones.
+    """
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prediction ("
+                "classifier TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                "title_hash INTEGER NOT NULL, poor REAL NOT NULL, "
+                "average REAL NOT NULL, good REAL NOT NULL, used_at REAL NOT NULL, "
+                "PRIMARY KEY (classifier, fingerprint, title_hash))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_prediction_used_at "
+                "ON prediction (used_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def invalidate(self, classifier: str, fingerprint: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM prediction WHERE classifier = ? AND fingerprint != ?",
+                (classifier, fingerprint),
+            )
+
+    def get(
+        self, classifier: str, fingerprint: str, title_hashes: list[int]
+    ) -> dict[int, np.ndarray]:
+        found: dict[int, np.ndarray] = {}
+        with closing(self._connect()) as conn, conn:
+            for i in range(0, len(title_hashes), 500):
+                chunk = title_hashes[i : i + 500]
+                params = (classifier, fingerprint, *chunk)
+                placeholders = ",".join("?" * len(chunk))
+                where = (
+                    "classifier = ? AND fingerprint = ? "
+                    f"AND title_hash IN ({placeholders})"
+                )
+                rows = conn.execute(
+                    f"SELECT title_hash, poor, average, good FROM prediction "
+                    f"WHERE {where}",
+                    params,
+                ).fetchall()
+                found.update((row[0], np.array(row[1:])) for row in rows)
+                conn.execute(
+                    f"UPDATE prediction SET used_at = ? WHERE {where}",
+                    (time.time(), *params),
+                )
+        return found
+
+    def put(
+        self, classifier: str, fingerprint: str, entries: dict[int, np.ndarray]
+    ) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prediction VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (classifier, fingerprint, title_hash, *map(float, proba), now)
+                    for title_hash, proba in entries.items()
+                ],
+            )
+            conn.execute(
+                "DELETE FROM prediction WHERE rowid IN (SELECT rowid FROM prediction "
+                "ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+class CachedClassifier(Classifier):
+    """Serves a classifier's predictions from a `PredictionCache`, running
+    the wrapped model only on the titles it has not seen before."""
+
+    def __init__(self, model: Classifier, cache: PredictionCache) -> None:
+        self.model = model
+        self.cache = cache
+        self.weight = model.weight
+        self.active = model.active
+        self.cost = model.cost
+        self.fingerprint = model.fingerprint
+        cache.invalidate(model.name, model.fingerprint)
+
+    @property
+    def name(self) -> str:
+        return self.model.name
+
+    def run(self, df):
+        hashes = [hash_title(normalize_title(title)) for title in df["title"]]
+        cached = self.cache.get(self.name, self.fingerprint, hashes)
+        proba = np.zeros((len(hashes), 3))
+        missing = [i for i, title_hash in enumerate(hashes) if title_hash not in cached]
+        if missing:
+            result = self.model.run(df.iloc[missing].reset_index(drop=True))
+            computed = result[PROBA_COLUMNS].to_numpy()
+            proba[missing] = computed
+            self.cache.put(
+                self.name,
+                self.fingerprint,
+                {hashes[i]: row for i, row in zip(missing, computed)},
+            )
+        for i, title_hash in enumerate(hashes):
+            if title_hash in cached:
+                proba[i] = cached[title_hash]
+        return DataFrame(proba, columns=PROBA_COLUMNS)
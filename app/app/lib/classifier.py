@@ -1,15 +1,46 @@
+import hashlib
+import os
 from abc import ABC, abstractmethod
+from pathlib import Path
 
 from pandas import DataFrame
 
 from .types import ClassifierConfig
 
+# Columns of the DataFrame every classifier returns, in Label order
+PROBA_COLUMNS = ["proba_poor", "proba_average", "proba_good"]
+
+
+def fingerprint(*paths: str) -> str:
+    """Digest of the name, size and mtime of every file under `paths`, cheap
+    enough to compute on each load and changed by any retrain or download."""
+    sha256 = hashlib.sha256()
+    for path in paths:
+        files = [Path(path)] if os.path.isfile(path) else sorted(Path(path).rglob("*"))
+        for file in files:
+            if file.is_file():
+                stat = file.stat()
+                sha256.update(f"{file}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return sha256.hexdigest()[:16]
+
 
 class Classifier(ABC):
 
+    # Files or directories the model is loaded from
+    artifacts: tuple[str, ...] = ()
+    # Identifies the loaded model artifacts, None for models without any
+    fingerprint: str | None = None
+
     def __init__(self, config: ClassifierConfig):
         self.weight = config.weight
         self.active = config.active
+        self.cost = config.cost
+        if self.artifacts:
+            self.fingerprint = fingerprint(*self.artifacts)
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
 
     @abstractmethod
     def run(self, df: DataFrame) -> DataFrame:
@@ -0,0 +1,101 @@
+import fcntl
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+import arrow
+from loguru import logger
+from sqlalchemy import Engine, select, update
+from sqlalchemy.orm import Session
+
+from ..models import Item, Label, bump_feed_versions
+
+
+class ClickQueue:
+    """Append-only log of click labels in its own WAL-mode SQLite file.
+
+    Recording a click never touches the main database, so it cannot block on
+    the writer lock held by the generate job. Labels are applied to `item` in
+    batches by `drain`, which holds no lock on the queue database while it
+    waits on the main one and only deletes the batch once it is applied, so a
+    batch that fails is applied again. Drains are serialized across workers by
+    a lock file next to the queue, so a stale batch is never applied over a
+    newer one, and a worker that finds it taken skips its drain.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS click ("
+                "id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL, "
+                "label INTEGER NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def push(self, item_id: int, label: Label) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO click (item_id, label, created_at) VALUES (?, ?, ?)",
+                (item_id, label.value, time.time()),
+            )
+
+    def drain(self, engine: Engine, batch_size: int = 500) -> int:
+        with open(f"{self.path}.lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    "SELECT id, item_id, label FROM click ORDER BY id LIMIT ?",
+                    (batch_size,),
+                ).fetchall()
+            if rows:
+                apply_labels(
+                    engine, {item_id: Label(label) for _, item_id, label in rows}
+                )
+                with closing(self._connect()) as conn:
+                    conn.execute("DELETE FROM click WHERE id <= ?", (rows[-1][0],))
+        return len(rows)
+
+
+def apply_labels(engine: Engine, labels: dict[int, Label]) -> None:
+    with Session(engine) as session:
+        stmt = select(Item.id, Item.feed_id).where(Item.id.in_(labels))
+        feed_ids = dict(session.execute(stmt).all())
+        ids = list(feed_ids)
+        if ids:
+            now = arrow.utcnow().naive
+            session.execute(
+                update(Item),
+                [{"id": id, "label": labels[id], "labeled_at": now} for id in ids],
+            )
+            bump_feed_versions(session, feed_ids.values())
+        session.commit()
+    logger.info("Applied {} of {} click labels", len(ids), len(labels))
+
+
+def start_flusher(
+    queue: ClickQueue, engine: Engine, interval: float, batch_size: int
+) -> threading.Thread:
+    def flush():
+        while True:
+            try:
+                while queue.drain(engine, batch_size) == batch_size:
+                    pass
+            except Exception as e:
+                logger.exception("Error while flushing clicks: {}", e)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=flush, name="click-flusher", daemon=True)
+    thread.start()
+    return thread
@@ -1,6 +1,7 @@
 import numpy as np
+import pandas as pd
 
-from .classifier import Classifier
+from .classifier import PROBA_COLUMNS, Classifier
 from .types import ClassifierConfig
 
 
@@ -11,4 +12,6 @@ class Constant(Classifier):
         self.constant = 1 if isPositive else 0
 
     def run(self, df):
-        return np.array([self.constant] * df.shape[0])
+        proba = np.zeros((df.shape[0], len(PROBA_COLUMNS)))
+        proba[:, -1 if self.constant else 0] = 1
+        return pd.DataFrame(proba, columns=PROBA_COLUMNS)
@@ -1,47 +1,75 @@
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 import torch
 import torch.nn.functional as F
 from loguru import logger
-from transformers import DistilBertForSequenceClassification, DistilBertTokenizer
+from transformers import DistilBertForSequenceClassification, DistilBertTokenizerFast
 
-from .classifier import Classifier
+from .batching import length_sorted_batches
+from .classifier import PROBA_COLUMNS, Classifier, fingerprint
 from .types import ClassifierConfig
 
+MODEL_PATH = "/data/models/distilbert"
+# Quantized model and tokenizer, rebuilt when MODEL_PATH's fingerprint changes
+QUANTIZED_PATH = "/data/models/distilbert-quantized"
+
+
+def load_quantized(
+    model_path: str = MODEL_PATH, artifact_path: str = QUANTIZED_PATH
+) -> tuple[torch.nn.Module, DistilBertTokenizerFast]:
+    artifact = Path(artifact_path)
+    source = fingerprint(model_path)
+    if (artifact / "source").is_file() and (artifact / "source").read_text() == source:
+        model = torch.load(artifact / "model.pt", mmap=True, weights_only=False)
+        return model, DistilBertTokenizerFast.from_pretrained(artifact_path)
+    logger.info("Building quantized DistilBERT artifact in {}", artifact_path)
+    model = torch.quantization.quantize_dynamic(
+        DistilBertForSequenceClassification.from_pretrained(model_path),
+        {torch.nn.Linear},
+        dtype=torch.qint8,
+    )
+    tokenizer = DistilBertTokenizerFast.from_pretrained("distilbert-base-uncased")
+    artifact.mkdir(parents=True, exist_ok=True)
+    tokenizer.save_pretrained(artifact_path)
+    torch.save(model, artifact / "model.tmp.pt")
+    (artifact / "model.tmp.pt").replace(artifact / "model.pt")
+    # Written last, a partial build is never mistaken for a complete one
+    (artifact / "source").write_text(source)
+    return model, tokenizer
+
 
 class DistilBERT(Classifier):
 
+    # The quantized artifact is derived from these, so it is left out
+    artifacts = (MODEL_PATH,)
+
     def __init__(self, config: ClassifierConfig) -> None:
         super().__init__(config)
-        self.model = DistilBertForSequenceClassification.from_pretrained(
-            "/data/models/distilbert"
-        )
-        self.device = (
-            torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
-        )
-        if not torch.cuda.is_available():
-            self.model = torch.quantization.quantize_dynamic(
-                self.model, {torch.nn.Linear}, dtype=torch.qint8
+        if torch.cuda.is_available():
+            self.device = torch.device("cuda")
+            self.model = DistilBertForSequenceClassification.from_pretrained(MODEL_PATH)
+            self.tokenizer = DistilBertTokenizerFast.from_pretrained(
+                "distilbert-base-uncased"
             )
+        else:
+            self.device = torch.device("cpu")
+            self.model, self.tokenizer = load_quantized()
         self.model.to(self.device)
         self.model.eval()
-        self.tokenizer = DistilBertTokenizer.from_pretrained("distilbert-base-uncased")
+        self.batch_size = config.batch_size
 
     def run(self, df):
-
-        def infer(title: str):
-            encodings = self.tokenizer(
-                title, return_tensors="pt", padding=True, truncation=True
-            )
-            with torch.no_grad():
-                output = self.model(**encodings)
-            smax = (
-                F.softmax(output.logits, dim=1).double().numpy()[0]
-            )  # Need [0] because it's a batched output even for single item inference
-            return smax
-
-        proba_series = df["title"].apply(lambda title: infer(title))
-        return pd.DataFrame(
-            proba_series.tolist(),
-            columns=["poor", "average", "good"],
-        )
+        titles = df["title"].tolist()
+        proba = np.zeros((len(titles), 3))
+        if not titles:
+            return pd.DataFrame(proba, columns=PROBA_COLUMNS)
+        for batch, inputs in length_sorted_batches(
+            self.tokenizer, titles, self.batch_size, return_tensors="pt"
+        ):
+            inputs = inputs.to(self.device)
+            with torch.inference_mode():
+                output = self.model(**inputs)
+            proba[batch] = F.softmax(output.logits, dim=1).double().cpu().numpy()
+        return pd.DataFrame(proba, columns=PROBA_COLUMNS)
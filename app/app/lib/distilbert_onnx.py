@@ -0,0 +1,48 @@
+import numpy as np
+import onnxruntime as ort
+import pandas as pd
+from transformers import DistilBertTokenizerFast
+
+from .batching import length_sorted_batches
+from .classifier import PROBA_COLUMNS, Classifier
+from .types import ClassifierConfig
+
+# Written by app.jobs.distilbert.export next to the fine-tuned model
+ONNX_PATH = "/data/models/distilbert-onnx"
+
+
+class DistilBERTONNX(Classifier):
+
+    artifacts = (ONNX_PATH,)
+
+    def __init__(self, config: ClassifierConfig) -> None:
+        super().__init__(config)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            f"{ONNX_PATH}/model.onnx",
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.tokenizer = DistilBertTokenizerFast.from_pretrained(ONNX_PATH)
+        self.batch_size = config.batch_size
+
+    def run(self, df):
+        titles = df["title"].tolist()
+        proba = np.zeros((len(titles), 3))
+        if not titles:
+            return pd.DataFrame(proba, columns=PROBA_COLUMNS)
+        for batch, inputs in length_sorted_batches(
+            self.tokenizer, titles, self.batch_size, return_tensors="np"
+        ):
+            (logits,) = self.session.run(
+                ["logits"],
+                {
+                    "input_ids": inputs["input_ids"].astype(np.int64),
+                    "attention_mask": inputs["attention_mask"].astype(np.int64),
+                },
+            )
+            logits = logits - logits.max(axis=1, keepdims=True)
+            exp = np.exp(logits)
+            proba[batch] = exp / exp.sum(axis=1, keepdims=True)
+        return pd.DataFrame(proba, columns=PROBA_COLUMNS)
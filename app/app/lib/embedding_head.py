@@ -0,0 +1,27 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from .classifier import PROBA_COLUMNS, Classifier
+from .types import ClassifierConfig
+
+HEAD_PATH = "/data/models/embedding-head.joblib"
+
+
+class EmbeddingHead(Classifier):
+    """Small classifier over the title embeddings generate puts in the
+    `embedding` column, trained by app.jobs.embeddings."""
+
+    artifacts = (HEAD_PATH,)
+
+    def __init__(self, config: ClassifierConfig):
+        super().__init__(config)
+        self.model = joblib.load(HEAD_PATH)
+
+    def run(self, df):
+        if df.empty:
+            return pd.DataFrame(columns=PROBA_COLUMNS, dtype=float)
+        return pd.DataFrame(
+            self.model.predict_proba(np.stack(df["embedding"])),
+            columns=PROBA_COLUMNS,
+        )
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import numpy as np
+import torch
+from transformers import DistilBertModel, DistilBertTokenizerFast
+
+from .batching import length_sorted_batches
+from .types import EmbeddingConfig
+
+
+class Encoder:
+    """Mean pooled DistilBERT sentence embeddings of titles."""
+
+    def __init__(self, config: EmbeddingConfig) -> None:
+        self.name = config.model
+        self.model = DistilBertModel.from_pretrained(config.model)
+        self.model.eval()
+        self.tokenizer = DistilBertTokenizerFast.from_pretrained(config.model)
+        self.batch_size = config.batch_size
+        self.dim = self.model.config.dim
+
+    def encode(self, titles: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(titles), self.dim), dtype=np.float32)
+        for batch, inputs in length_sorted_batches(
+            self.tokenizer, titles, self.batch_size, return_tensors="pt"
+        ):
+            with torch.inference_mode():
+                hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1)
+            vectors[batch] = pooled.numpy()
+        return vectors
+
+
+class EmbeddingStore:
+    """Title embeddings in a memory mapped float32 file, row i holding the
+    embedding of the item with id i and all zeros where there is none.
+
+    The store is tied to the encoder that filled it, opening it with another
+    encoder name empties it so vectors from different models never mix.
+    """
+
+    def __init__(self, path: str, encoder: str, dim: int = 768) -> None:
+        self.dim = dim
+        root = Path(path)
+        root.mkdir(parents=True, exist_ok=True)
+        self.vectors = root / "vectors.f32"
+        meta = root / "encoder"
+        if not meta.is_file() or meta.read_text() != f"{encoder}:{dim}":
+            self.vectors.write_bytes(b"")
+            meta.write_text(f"{encoder}:{dim}")
+        self.vectors.touch()
+
+    @property
+    def rows(self) -> int:
+        return self.vectors.stat().st_size // (self.dim * 4)
+
+    def _open(self, mode: str) -> np.memmap:
+        return np.memmap(
+            self.vectors, dtype=np.float32, mode=mode, shape=(self.rows, self.dim)
+        )
+
+    def put(self, ids: list[int], vectors: np.ndarray) -> None:
+        if not ids:
+            return
+        if (needed := max(ids) + 1) > self.rows:
+            with open(self.vectors, "r+b") as file:
+                file.truncate(needed * self.dim * 4)
+        store = self._open("r+")
+        store[ids] = vectors
+        store.flush()
+
+    def get(self, ids: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the vectors of `ids` and a mask of the ones that were set."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.zeros((len(ids), self.dim), dtype=np.float32)
+        if rows := self.rows:
+            inside = ids < rows
+            vectors[inside] = self._open("r")[ids[inside]]
+        return vectors, vectors.any(axis=1)
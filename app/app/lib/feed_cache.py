@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+from pydantic import BaseModel
+from sqlalchemy import Engine, select
+from sqlalchemy.orm import Session
+
+from ..models import Feed
+from .render import encode, feed_items, is_filtered, serialize_feed
+from .types import Config, FeedConfig, ParsedChannel
+
+
+class RenderedFeed(BaseModel):
+    version: int
+    rendered_at: float
+    # When the content last changed, for Last-Modified
+    modified_at: float
+    etag: str
+    content: bytes
+    encoded: dict[str, bytes]
+
+
+class FeedCache:
+    """Per-process LRU of feeds rendered from the database.
+
+    Entries are keyed by feed URL and filter mode and hold the feed's
+    `version` from when they were rendered. Each lookup reads the current
+    version, a single indexed row, and only re-renders when it moved on or
+    the entry is older than `max_age`, which ages items out of the window.
+    """
+
+    def __init__(self, engine: Engine, max_entries: int, max_age: float) -> None:
+        self.engine = engine
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries: OrderedDict[tuple[str, bool], RenderedFeed] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, config: Config, feed_config: FeedConfig) -> RenderedFeed | None:
+        key = (feed_config.url, is_filtered(config, feed_config))
+        with Session(self.engine) as session:
+            stmt = select(Feed).where(Feed.url == feed_config.url)
+            feed = session.scalars(stmt).one_or_none()
+            if feed is None or feed.title is None:
+                return None
+            with self.lock:
+                cached = self.entries.get(key)
+                if (
+                    cached
+                    and cached.version == feed.version
+                    and time.time() - cached.rendered_at < self.max_age
+                ):
+                    self.entries.move_to_end(key)
+                    return cached
+            buffer = BytesIO()
+            channel = ParsedChannel(
+                title=feed.title, link=feed.link, description=feed.description
+            )
+            serialize_feed(
+                buffer, channel, feed_items(session, config, feed_config, feed.id)
+            )
+        content = buffer.getvalue()
+        etag = hashlib.sha256(content).hexdigest()[:32]
+        now = time.time()
+        entry = RenderedFeed(
+            version=feed.version,
+            rendered_at=now,
+            modified_at=cached.modified_at if cached and cached.etag == etag else now,
+            etag=etag,
+            content=content,
+            encoded=encode(content),
+        )
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
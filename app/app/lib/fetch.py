@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+from loguru import logger
+from pydantic import BaseModel, ConfigDict
+
+from ..models import FetchState
+from .parser import FeedParser
+from .types import FeedConfig, FetchConfig, ParsedChannel
+
+
+class FetchResult(BaseModel):
+    """Outcome of polling one feed, `parser` is only set when the feed has new
+    content and `failed` when it could not be fetched or parsed."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    feed: FeedConfig
+    channel: ParsedChannel | None = None
+    parser: FeedParser | None = None
+    failed: bool = False
+    etag: str | None = None
+    last_modified: str | None = None
+    digest: str | None = None
+    retry_after: int | None = None
+
+
+def conditional_headers(state: FetchState | None) -> dict[str, str]:
+    headers = {}
+    if state and state.etag:
+        headers["If-None-Match"] = state.etag
+    if state and state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+    return headers
+
+
+def requested_delay(headers: httpx.Headers) -> int | None:
+    """Seconds the server asks us to wait through `Retry-After` or
+    `Cache-Control: max-age`, whichever is longer."""
+    delays = []
+    retry_after = headers.get("Retry-After", "").strip()
+    if retry_after.isdigit():
+        delays.append(int(retry_after))
+    elif retry_after:
+        try:
+            delay = parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)
+            delays.append(int(delay.total_seconds()))
+        except (TypeError, ValueError):
+            pass
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "max-age" and value.strip().isdigit():
+            delays.append(int(value))
+    return max(delays) if delays else None
+
+
+async def fetch_feed(
+    client: httpx.AsyncClient,
+    feed_config: FeedConfig,
+    state: FetchState | None,
+    semaphore: asyncio.Semaphore,
+    host_semaphore: asyncio.Semaphore,
+    timeout: float,
+) -> FetchResult:
+    unchanged = FetchResult(
+        feed=feed_config,
+        etag=state.etag if state else None,
+        last_modified=state.last_modified if state else None,
+        digest=state.digest if state else None,
+    )
+    try:
+        # Host first, so feeds queued behind a busy host hold no global slot
+        async with host_semaphore, semaphore:
+            async with asyncio.timeout(timeout):
+                r = await client.get(
+                    feed_config.url, headers=conditional_headers(state)
+                )
+        retry_after = requested_delay(r.headers)
+        if r.status_code == httpx.codes.NOT_MODIFIED:
+            logger.info("Not modified {}", feed_config.url)
+            return unchanged.model_copy(update={"retry_after": retry_after})
+        if r.is_error:
+            logger.error("Failed fetching {}: {}", feed_config.url, r.status_code)
+            return FetchResult(feed=feed_config, failed=True, retry_after=retry_after)
+        digest = hashlib.sha256(r.content).hexdigest()
+        if state and state.digest == digest:
+            logger.info("Unchanged content {}", feed_config.url)
+            # Servers that rotate validators would otherwise never answer 304
+            return unchanged.model_copy(
+                update={
+                    "etag": r.headers.get("ETag", unchanged.etag),
+                    "last_modified": r.headers.get(
+                        "Last-Modified", unchanged.last_modified
+                    ),
+                    "retry_after": retry_after,
+                }
+            )
+        parser = FeedParser(r.content)
+        logger.info("Successfully parsed {}", parser.channel.title)
+        return FetchResult(
+            feed=feed_config,
+            channel=parser.channel,
+            parser=parser,
+            etag=r.headers.get("ETag"),
+            last_modified=r.headers.get("Last-Modified"),
+            digest=digest,
+            retry_after=retry_after,
+        )
+    except Exception as e:
+        logger.exception("Failed parsing {}: {}", feed_config.url, e)
+        return FetchResult(feed=feed_config, failed=True)
+
+
+async def fetch_feeds(
+    feed_configs: list[FeedConfig],
+    states: dict[str, FetchState],
+    config: FetchConfig,
+    queue: asyncio.Queue | None = None,
+) -> list[FetchResult]:
+    """Fetch every feed concurrently over one keep-alive client.
+
+    Concurrency is capped globally by `max_connections` and per host by
+    `max_connections_per_host`. `states` maps a feed URL to its last fetch
+    state, which is sent as a conditional GET, so a feed that answers 304 or
+    serves the same bytes as last time comes back without a parser, as does
+    one that fails or exceeds `timeout`. Only the channel is parsed here,
+    items are left to the caller through `FetchResult.parser`. Results keep
+    the order of `feed_configs`. With a `queue`, each result is also put on it
+    as soon as its fetch completes.
+    """
+    semaphore = asyncio.Semaphore(config.max_connections)
+    host_semaphores: defaultdict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(config.max_connections_per_host)
+    )
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_connections,
+    )
+
+    async def fetch(client: httpx.AsyncClient, feed_config: FeedConfig):
+        result = await fetch_feed(
+            client,
+            feed_config,
+            states.get(feed_config.url),
+            semaphore,
+            host_semaphores[urlsplit(feed_config.url).netloc],
+            config.timeout,
+        )
+        if queue is not None:
+            await queue.put(result)
+        return result
+
+    async with httpx.AsyncClient(
+        follow_redirects=True, limits=limits, timeout=config.timeout
+    ) as client:
+        results = await asyncio.gather(
+            *[fetch(client, feed_config) for feed_config in feed_configs]
+        )
+    return results
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ConfigDict
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from ..models import Label
+from .classifier import PROBA_COLUMNS, Classifier
+from .types import ClassifierConfig
+
+ONLINE_PATH = "/data/models/hashing-sgd.joblib"
+CLASSES = np.array([label.value for label in Label])
+
+
+class Checkpoint(BaseModel):
+    """Online classifier state, updated in place by app.jobs.online.
+
+    `cursor` is the (labeled_at, id) of the last label learned and `counts`
+    the number of labels learned per class, for class balancing.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorizer: HashingVectorizer
+    model: SGDClassifier
+    counts: np.ndarray
+    cursor: tuple[datetime, int] | None = None
+
+    @classmethod
+    def new(cls) -> "Checkpoint":
+        return cls(
+            # Stateless, so new titles need no refit of a vocabulary
+            vectorizer=HashingVectorizer(
+                n_features=2**20, ngram_range=(1, 2), alternate_sign=False
+            ),
+            model=SGDClassifier(loss="log_loss", alpha=1e-5),
+            counts=np.zeros(len(CLASSES)),
+        )
+
+    def partial_fit(self, titles: list[str], labels: np.ndarray) -> None:
+        self.counts += np.bincount(labels, minlength=len(CLASSES))
+        # Inverse class frequency over every label seen so far
+        weights = self.counts.sum() / (len(CLASSES) * np.maximum(self.counts, 1))
+        self.model.partial_fit(
+            self.vectorizer.transform(titles),
+            labels,
+            classes=CLASSES,
+            sample_weight=weights[labels],
+        )
+
+
+class HashingSGD(Classifier):
+
+    artifacts = (ONLINE_PATH,)
+
+    def __init__(self, config: ClassifierConfig):
+        super().__init__(config)
+        self.checkpoint: Checkpoint = joblib.load(ONLINE_PATH)
+        if not hasattr(self.checkpoint.model, "classes_"):
+            raise ValueError(f"{ONLINE_PATH} has not been fitted")
+
+    def run(self, df):
+        checkpoint = self.checkpoint
+        return pd.DataFrame(
+            checkpoint.model.predict_proba(
+                checkpoint.vectorizer.transform(df["title"])
+            ),
+            columns=PROBA_COLUMNS,
+        )
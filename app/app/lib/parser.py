@@ -0,0 +1,95 @@
+from collections import deque
+from typing import Iterator
+from xml.etree.ElementTree import Element, XMLPullParser
+
+from loguru import logger
+from pydantic import ValidationError
+
+from .types import ParsedChannel, ParsedItem
+
+
+class FeedParser:
+    """Incremental RSS 2.0 parser over the raw bytes of a response.
+
+    The document is fed to the XML parser in chunks and only as far as the
+    caller consumes it, `channel` stops at the first `<item>` when the channel
+    fields come first (as they do in practice) and `items` yields one
+    `ParsedItem` at a time, discarding each element once it is built.
+    """
+
+    def __init__(self, content: bytes, chunk_size: int = 16384) -> None:
+        self._content = memoryview(content)
+        self._chunk_size = chunk_size
+        self._offset = 0
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._path: list[str] = []
+        self._channel_element: Element | None = None
+        self._channel_fields: dict[str, str] = {}
+        self.skip_hours: set[int] = set()
+        self._pending: deque[ParsedItem] = deque()
+        self._channel: ParsedChannel | None = None
+        self._done = False
+
+    @property
+    def channel(self) -> ParsedChannel:
+        while self._channel is None:
+            missing = {"title", "link", "description"} - self._channel_fields.keys()
+            if not missing or self._done:
+                self._channel = ParsedChannel(**self._channel_fields)
+                break
+            self._advance()
+        return self._channel
+
+    @property
+    def ttl(self) -> int | None:
+        """Channel `<ttl>` in minutes, once the channel has been parsed."""
+        try:
+            return int(self._channel_fields["ttl"])
+        except (KeyError, ValueError):
+            return None
+
+    def items(self) -> Iterator[ParsedItem]:
+        while True:
+            while self._pending:
+                yield self._pending.popleft()
+            if self._done:
+                return
+            self._advance()
+
+    def _advance(self) -> None:
+        if self._offset >= len(self._content):
+            self._parser.close()
+            self._done = True
+            return
+        chunk = self._content[self._offset : self._offset + self._chunk_size]
+        self._offset += self._chunk_size
+        self._parser.feed(bytes(chunk))
+        for event, element in self._parser.read_events():
+            if event == "start":
+                self._path.append(element.tag)
+                if self._path == ["rss", "channel"]:
+                    self._channel_element = element
+                continue
+            path, self._path = self._path, self._path[:-1]
+            if path == ["rss", "channel", "item"]:
+                self._pending.extend(self._build_item(element))
+                if self._channel_element is not None:
+                    self._channel_element.remove(element)
+            elif len(path) == 3 and path[:2] == ["rss", "channel"]:
+                self._channel_fields[element.tag] = element.text or ""
+            elif path == ["rss", "channel", "skipHours", "hour"]:
+                if element.text and element.text.strip().isdigit():
+                    self.skip_hours.add(int(element.text) % 24)
+
+    def _build_item(self, element: Element) -> list[ParsedItem]:
+        fields = {}
+        for child in element:
+            if child.tag == "enclosure":
+                fields[child.tag] = child.get("url")
+            else:
+                fields[child.tag] = child.text
+        try:
+            return [ParsedItem(**fields)]
+        except ValidationError as e:
+            logger.warning("Skipping malformed item {}: {}", fields.get("title"), e)
+            return []
@@ -0,0 +1,78 @@
+from importlib import import_module
+
+from loguru import logger
+
+from .cache import CachedClassifier, PredictionCache
+from .classifier import Classifier, fingerprint
+from .constant import Constant
+from .types import ClassifierConfig, Config
+
+# Classifier implementations by their key in config.classifiers, with
+# "<key>/<backend>" for alternative backends. Modules are only imported when
+# a classifier is instantiated, so importing this module stays cheap.
+REGISTRY: dict[str, str] = {
+    "tfidf": "app.lib.tfidf:TFIDFLogistic",
+    "distilbert": "app.lib.distilbert:DistilBERT",
+    "distilbert/onnx": "app.lib.distilbert_onnx:DistilBERTONNX",
+    "embedding": "app.lib.embedding_head:EmbeddingHead",
+    "online": "app.lib.online:HashingSGD",
+}
+
+
+def resolve(name: str, config: ClassifierConfig) -> type[Classifier]:
+    target = REGISTRY.get(f"{name}/{config.backend}") or REGISTRY[name]
+    module, cls = target.split(":")
+    return getattr(import_module(module), cls)
+
+
+def artifacts_fingerprint(name: str, config: ClassifierConfig) -> str:
+    """Fingerprint of the artifacts a classifier would load, without loading
+    it, so a retrain of one model can be told apart from the others."""
+    return fingerprint(*resolve(name, config).artifacts)
+
+
+def prediction_cache(config: Config) -> PredictionCache | None:
+    if not config.prediction_cache.active:
+        return None
+    return PredictionCache(
+        config.prediction_cache.path, config.prediction_cache.max_entries
+    )
+
+
+def enabled_classifiers(config: Config) -> dict[str, ClassifierConfig]:
+    enabled = {}
+    for name, cfg in config.classifiers.items():
+        if not cfg.active:
+            continue
+        if name not in REGISTRY:
+            logger.error("Unknown classifier {}", name)
+            continue
+        if name == "embedding" and not config.embeddings.active:
+            logger.warning("Embedding classifier needs embeddings to be active")
+            continue
+        enabled[name] = cfg
+    return enabled
+
+
+def load_model(
+    name: str, config: ClassifierConfig, cache: PredictionCache | None
+) -> Classifier:
+    try:
+        model = resolve(name, config)(config)
+        if cache and model.fingerprint:
+            model = CachedClassifier(model, cache)
+        return model
+    except Exception as e:
+        logger.exception("Error while loading model: {}", e)
+        return Constant(config, True)
+
+
+def load_models(config: Config) -> dict[str, Classifier]:
+    """Active classifiers by their key in config.classifiers."""
+    cache = prediction_cache(config)
+    models = {
+        name: load_model(name, cfg, cache)
+        for name, cfg in enabled_classifiers(config).items()
+    }
+    logger.info("Loaded models: {}", list(models.values()))
+    return models
@@ -0,0 +1,161 @@
+import filecmp
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+from xml.sax.saxutils import XMLGenerator
+
+import arrow
+import brotli
+from sqlalchemy import Row
+from sqlalchemy.orm import Session
+
+from ..models import Label, get_recent_feed_rows
+from .types import Config, FeedConfig, ParsedChannel
+
+FEEDS_PATH = Path("/data/feeds")
+
+# Precompressed sidecars written next to each feed, by Content-Encoding
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def _element(xml: XMLGenerator, name: str, text: str, depth: int) -> None:
+    xml.ignorableWhitespace("\n" + "\t" * depth)
+    xml.startElement(name, {})
+    xml.characters(text)
+    xml.endElement(name)
+
+
+def serialize_feed(
+    file: BinaryIO, channel: ParsedChannel, items: Iterable[dict[str, str | None]]
+) -> None:
+    """Stream an RSS document to `file`, consuming `items` lazily and leaving
+    out fields that are None."""
+    xml = XMLGenerator(file, encoding="utf-8", short_empty_elements=True)
+    xml.startDocument()
+    xml.startElement("rss", {"version": "2.0"})
+    xml.ignorableWhitespace("\n\t")
+    xml.startElement("channel", {})
+    for name, text in channel:
+        _element(xml, name, text, 2)
+    for item in items:
+        xml.ignorableWhitespace("\n\t\t")
+        xml.startElement("item", {})
+        for name, text in item.items():
+            if text is not None:
+                _element(xml, name, text, 3)
+        xml.ignorableWhitespace("\n\t\t")
+        xml.endElement("item")
+    xml.ignorableWhitespace("\n\t")
+    xml.endElement("channel")
+    xml.ignorableWhitespace("\n")
+    xml.endElement("rss")
+    xml.endDocument()
+
+
+def write_feed(
+    path: Path, channel: ParsedChannel, items: Iterable[dict[str, str | None]]
+) -> bool:
+    """Serialize a feed to a temporary file next to `path` and rename it over
+    `path`, so readers only ever see a complete feed.
+
+    When the new document is byte-identical to the current one the rename is
+    skipped, keeping the file's mtime for conditional GETs. Returns whether
+    `path` changed. See `write_sidecars` for the files written alongside.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as file:
+        try:
+            serialize_feed(file, channel, items)
+        except:
+            os.unlink(file.name)
+            raise
+    if path.exists() and filecmp.cmp(file.name, path, shallow=False):
+        os.unlink(file.name)
+        if not etag_path(path).exists():
+            write_sidecars(path, path.read_bytes())
+        return False
+    write_sidecars(path, Path(file.name).read_bytes(), staged=file.name)
+    return True
+
+
+def is_filtered(config: Config, feed_config: FeedConfig) -> bool:
+    if feed_config.filter is None:
+        return not config.cold_start
+    return feed_config.filter
+
+
+def feed_items(
+    session: Session, config: Config, feed_config: FeedConfig, feed_id: int
+) -> Iterator[dict[str, str | None]]:
+    """Rendered items of a feed's last two weeks, only the average and good
+    ones when it is filtered. A click label overrides the predicted one."""
+    rows = get_recent_feed_rows(
+        session,
+        feed_id,
+        arrow.utcnow().shift(weeks=-2).naive,
+        [Label.AVERAGE, Label.GOOD] if is_filtered(config, feed_config) else [],
+    )
+    return (render_item(config.host, row) for row in rows)
+
+
+def render_item(host: str, row: Row) -> dict[str, str | None]:
+    emphasize = f"<a href='{host}/update/{row.id}/2'>&#11088; Click To Emphasize</a>"
+    deemphasize = (
+        f"<a href='{host}/update/{row.id}/0'>&#128308; Click To De-emphasize</a>"
+    )
+    title = row.title
+    if row.label is Label.GOOD:
+        title = f"&#11088; | {title}"
+    elif row.label is Label.AVERAGE:
+        title = f"&#128309; | {title}"
+    elif row.label is Label.POOR:
+        title = f"&#128308; | {title}"
+    return {
+        "title": title,
+        "link": f"{host}/update/{row.id}/1",
+        "description": f"<p>{emphasize} || {deemphasize}</p><br>{row.description}",
+        "author": row.author,
+        "comments": row.comments,
+        "enclosure": row.enclosure,
+        "guid": row.guid,
+        "pubDate": row.pubDate,
+    }
+
+
+def encode(content: bytes) -> dict[str, bytes]:
+    """`content` compressed for each Content-Encoding in `ENCODINGS`."""
+    return {
+        "br": brotli.compress(content, mode=brotli.MODE_TEXT),
+        "gzip": gzip.compress(content, mtime=0),
+    }
+
+
+def etag_path(path: Path) -> Path:
+    return path.with_name(path.name + ".etag")
+
+
+def _replace(path: Path, content: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(content)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def write_sidecars(path: Path, content: bytes, staged: str | None = None) -> None:
+    """Write the brotli and gzip encoded copies of `content` and its ETag
+    next to `path`, moving `staged` over `path`.
+
+    The ETag goes last, so it never names content that is not in place yet
+    and a client can at worst revalidate once more than needed.
+    """
+    for encoding, encoded in encode(content).items():
+        _replace(path.with_name(path.name + ENCODINGS[encoding]), encoded)
+    if staged:
+        os.chmod(staged, 0o644)
+        os.replace(staged, path)
+    _replace(etag_path(path), hashlib.sha256(content).hexdigest()[:32].encode())
@@ -0,0 +1,16 @@
+from collections import Counter
+
+import pandas as pd
+from pandas import DataFrame
+from sklearn.utils import resample
+
+
+def upsample_dataframe_by_label(df: DataFrame) -> DataFrame:
+    n_samples = (
+        max(Counter(df["label"]).values()) * 2
+    )  # Doubling to improve odds of at least one use of each entry
+    resampled: list[DataFrame] = [
+        resample(df[df["label"] == cls], replace=True, n_samples=n_samples)
+        for cls in df["label"].unique()
+    ]
+    return pd.concat(resampled, ignore_index=True)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from .types import ScheduleConfig
+
+
+def is_due(next_due_at: datetime | None, now: datetime) -> bool:
+    return next_due_at is None or next_due_at <= now
+
+
+def poll_interval(
+    now: datetime, publish_times: list[datetime], config: ScheduleConfig
+) -> timedelta:
+    """Interval that polls a feed `polls_per_item` times per item published
+    over the lookback window, clamped to the configured bounds."""
+    since = now - timedelta(days=config.lookback_days)
+    recent = [t for t in publish_times if since <= t <= now]
+    if not recent:
+        return timedelta(minutes=config.max_interval)
+    observed = max(now - min(recent), timedelta(minutes=config.min_interval))
+    interval = observed / len(recent) / config.polls_per_item
+    return min(
+        max(interval, timedelta(minutes=config.min_interval)),
+        timedelta(minutes=config.max_interval),
+    )
+
+
+def next_poll_at(
+    now: datetime,
+    publish_times: list[datetime],
+    config: ScheduleConfig,
+    ttl: int | None = None,
+    skip_hours: set[int] = set(),
+    retry_after: int | None = None,
+) -> datetime:
+    """When a feed is next due, honouring the channel's `<ttl>` (minutes) and
+    `<skipHours>` (UTC hours) and the server's requested delay in seconds."""
+    interval = poll_interval(now, publish_times, config)
+    if ttl:
+        interval = max(interval, timedelta(minutes=ttl))
+    if retry_after:
+        interval = max(interval, timedelta(seconds=retry_after))
+    due = now + interval
+    for _ in range(24):
+        if due.hour not in skip_hours:
+            break
+        due = due.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    return due
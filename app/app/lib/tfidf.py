@@ -2,18 +2,22 @@ import joblib
 import pandas as pd
 from sklearn.pipeline import Pipeline
 
-from .classifier import Classifier
+from .classifier import PROBA_COLUMNS, Classifier
 from .types import ClassifierConfig
 
+TFIDF_PATH = "/data/models/tf-idf-logistic.joblib"
+
 
 class TFIDFLogistic(Classifier):
 
+    artifacts = (TFIDF_PATH,)
+
     def __init__(self, config: ClassifierConfig):
         super().__init__(config)
-        self.model: Pipeline = joblib.load("/data/models/tf-idf-logistic.joblib")
+        self.model: Pipeline = joblib.load(TFIDF_PATH)
 
     def run(self, df):
         return pd.DataFrame(
             self.model.predict_proba(df["title"]),
-            columns=["poor", "average", "good"],
+            columns=PROBA_COLUMNS,
         )
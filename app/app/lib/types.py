@@ -1,9 +1,16 @@
+from typing import Literal
+
 from pydantic import BaseModel, field_validator
 
 
 class ClassifierConfig(BaseModel):
     weight: int = 1
     active: bool = True
+    batch_size: int = 32
+    # Relative inference cost, cascade stages run from cheapest to dearest
+    cost: int = 1
+    # Runtime for transformer models, onnx needs app.jobs.distilbert.export
+    backend: Literal["torch", "onnx"] = "torch"
 
 
 class FeedConfig(BaseModel):
@@ -11,11 +18,102 @@ class FeedConfig(BaseModel):
     filter: bool | None = None
 
 
+class FetchConfig(BaseModel):
+    max_connections: int = 20
+    max_connections_per_host: int = 4
+    timeout: float = 30
+    stop_after_seen: int = 5
+
+
+class ScheduleConfig(BaseModel):
+    # Minutes between polls of a feed, the rate based interval is clamped to
+    # [min_interval, max_interval] and default_interval is used after a failure
+    min_interval: int = 5
+    default_interval: int = 20
+    max_interval: int = 24 * 60
+    lookback_days: int = 14
+    polls_per_item: float = 2
+
+
+class MaintenanceConfig(BaseModel):
+    # Unlabeled items older than this are archived, or only lose their
+    # description when archive is off
+    retention_days: int = 90
+    archive: bool = True
+
+
+class ClickConfig(BaseModel):
+    path: str = "/data/clicks.db"
+    flush_interval: float = 5
+    batch_size: int = 500
+
+
+class PredictionCacheConfig(BaseModel):
+    active: bool = True
+    path: str = "/data/cache/predictions.db"
+    max_entries: int = 100_000
+
+
+class CascadeConfig(BaseModel):
+    # Items whose ensemble margin reaches threshold after a stage skip the
+    # remaining, more expensive classifiers
+    active: bool = False
+    threshold: float = 0.5
+
+
+class EmbeddingConfig(BaseModel):
+    # Title embeddings computed once per item at insert time, for the
+    # embedding classifier head
+    active: bool = False
+    path: str = "/data/embeddings"
+    model: str = "distilbert-base-uncased"
+    batch_size: int = 32
+
+
+class DaemonConfig(BaseModel):
+    # Seconds between due checks of the generate daemon
+    interval: float = 60
+
+
+class PipelineConfig(BaseModel):
+    # New items from all feeds are scored together once batch_size of them
+    # are pending or flush_interval seconds after the first one arrived
+    batch_size: int = 256
+    flush_interval: float = 1
+    queue_size: int = 16
+
+
+class FeedCacheConfig(BaseModel):
+    # Feeds rendered on request by each web worker, re-rendered when the
+    # feed changes or after max_age seconds
+    active: bool = True
+    max_entries: int = 64
+    max_age: float = 3600
+
+
+class OnlineConfig(BaseModel):
+    # Labels per partial_fit step of the online classifier, and passes over
+    # all labels when it is refit from scratch
+    batch_size: int = 1000
+    refit_epochs: int = 5
+
+
 class Config(BaseModel):
     host: str
     db_url: str
     feeds: list[FeedConfig]
     classifiers: dict[str, ClassifierConfig]
+    fetch: FetchConfig = FetchConfig()
+    schedule: ScheduleConfig = ScheduleConfig()
+    maintenance: MaintenanceConfig = MaintenanceConfig()
+    clicks: ClickConfig = ClickConfig()
+    prediction_cache: PredictionCacheConfig = PredictionCacheConfig()
+    cascade: CascadeConfig = CascadeConfig()
+    embeddings: EmbeddingConfig = EmbeddingConfig()
+    daemon: DaemonConfig = DaemonConfig()
+    pipeline: PipelineConfig = PipelineConfig()
+    feed_cache: FeedCacheConfig = FeedCacheConfig()
+    online: OnlineConfig = OnlineConfig()
     iam_role: str | None = None
     cold_start: bool = False
 
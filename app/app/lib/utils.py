@@ -1,44 +1,62 @@
 import base64
 import hashlib
-from collections import Counter
+import os
+import threading
 
-import pandas as pd
 import yaml
 from loguru import logger
-from pandas import DataFrame
-from sklearn.utils import resample
 
-from app.models import Label
+from .types import Config, FeedConfig
 
-from .classifier import Classifier
-from .constant import Constant
-from .distilbert import DistilBERT
-from .tfidf import TFIDFLogistic
-from .types import Config
+
+class ConfigProvider:
+    """Process-wide cache of the parsed config.
+
+    Each `get` only stats the file and parses it again when its mtime, size
+    or inode changed, so edits are picked up without a restart. If an edited
+    file fails to load, the last good config is kept and the error logged.
+    """
+
+    def __init__(self, path: str = "/config/config.yml") -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.snapshot: tuple[tuple, Config, dict[str, FeedConfig]] | None = None
+        self.failed: tuple | None = None
+
+    def _load(self) -> tuple[tuple, Config, dict[str, FeedConfig]]:
+        stat = os.stat(self.path)
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        snapshot = self.snapshot
+        if snapshot and key in (snapshot[0], self.failed):
+            return snapshot
+        with self.lock:
+            if self.snapshot and key in (self.snapshot[0], self.failed):
+                return self.snapshot
+            try:
+                with open(file=self.path, mode="r") as file:
+                    config = Config(**yaml.safe_load(file))
+            except Exception as e:
+                if not self.snapshot:
+                    raise
+                logger.error("Keeping previous config, failed to load: {}", e)
+                self.failed = key
+                return self.snapshot
+            feeds = {hash_url(feed.url): feed for feed in config.feeds}
+            self.snapshot = (key, config, feeds)
+            return self.snapshot
+
+    def get(self) -> Config:
+        return self._load()[1]
+
+    def feed_by_hash(self, feed_hash: str) -> FeedConfig | None:
+        return self._load()[2].get(feed_hash)
+
+
+config_provider = ConfigProvider()
 
 
 def load_config() -> Config:
-    with open(file="/config/config.yml", mode="r") as file:
-        config = yaml.safe_load(file)
-    return Config(**config)
-
-
-def load_models(config: Config) -> list[Classifier]:
-    models: list[Classifier] = []
-    init = [
-        (TFIDFLogistic, config.classifiers["tfidf"]),
-        (DistilBERT, config.classifiers["distilbert"]),
-    ]
-    for cls, cfg in init:
-        if not cfg.active:
-            continue
-        try:
-            models.append(cls(cfg))
-        except Exception as e:
-            logger.exception("Error while loading model: {}", e)
-            models.append(Constant(cfg, True))
-    logger.info("Loaded models: {}", models)
-    return models
+    return config_provider.get()
 
 
 def hash_url(url: str, max_len=8):
@@ -47,14 +65,3 @@ def hash_url(url: str, max_len=8):
     base64_hashed = base64.urlsafe_b64encode(sha256.digest()).decode("utf-8")
     truncated_hashed_string = base64_hashed[:max_len]
     return truncated_hashed_string
-
-
-def upsample_dataframe_by_label(df: DataFrame) -> DataFrame:
-    n_samples = (
-        max(Counter(df["label"]).values()) * 2
-    )  # Doubling to improve odds of at least one use of each entry
-    resampled: list[DataFrame] = [
-        resample(df[df["label"] == cls], replace=True, n_samples=n_samples)
-        for cls in df["label"].unique()
-    ]
-    return pd.concat(resampled, ignore_index=True)
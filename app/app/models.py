@@ -1,15 +1,43 @@
-from datetime import datetime
+import hashlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from enum import Enum
-from typing import Sequence
+from typing import Any, Iterable, Iterator
 
-import arrow
-from sqlalchemy import DateTime, Index, MetaData, UniqueConstraint, func, select
-from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    MetaData,
+    Row,
+    UniqueConstraint,
+    delete,
+    func,
+    insert,
+    null,
+    select,
+    union,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    Session,
+    mapped_column,
+    relationship,
+)
+
+from .compression import CompressedText
+from .lib.types import ParsedChannel
 
 constraint_naming_conventions = {
     "ix": "ix_%(table_name)s_%(column_0_N_name)s",
     "uq": "uq_%(table_name)s_%(column_0_N_name)s",
     "pk": "pk_%(table_name)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 }
 
 
@@ -23,8 +51,29 @@ class Label(Enum):
     GOOD = 2  # Interested enough to follow the link
 
 
-class Item(Base):
-    __tablename__ = "item"
+def hash_title(title: str) -> int:
+    """Signed 64-bit digest of a title, the fixed-width key items are
+    deduplicated on within a feed."""
+    digest = hashlib.blake2b(title.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class Feed(Base):
+    __tablename__ = "feed"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), nullable=False
+    )
+    url: Mapped[str] = mapped_column(unique=True)
+    # Channel of the last fetch, for rendering the feed without fetching it
+    title: Mapped[str | None]
+    link: Mapped[str | None]
+    description: Mapped[str | None]
+    # Bumped whenever the feed's items or labels change
+    version: Mapped[int] = mapped_column(default=0, server_default="0")
+
+
+class ItemColumns:
     id: Mapped[int] = mapped_column(primary_key=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=func.now(), nullable=False
@@ -32,12 +81,22 @@ class Item(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=func.now(), onupdate=func.now(), nullable=False
     )
-    feed_url: Mapped[str]
+    feed_id: Mapped[int] = mapped_column(ForeignKey("feed.id"))
+    title_hash: Mapped[int] = mapped_column(BigInteger)
     title: Mapped[str]
     link: Mapped[str]
     predicted_label: Mapped[Label | None]
     label: Mapped[Label | None]
-    description: Mapped[str | None]
+    # When label was last set by a click, the online classifier's cursor
+    labeled_at: Mapped[datetime | None]
+    # Weighted ensemble probabilities and the gap between the top two
+    proba_poor: Mapped[float | None] = mapped_column(Float)
+    proba_average: Mapped[float | None] = mapped_column(Float)
+    proba_good: Mapped[float | None] = mapped_column(Float)
+    margin: Mapped[float | None] = mapped_column(Float)
+    # Name of the last classifier that ran on the item
+    decided_by: Mapped[str | None]
+    description: Mapped[str | None] = mapped_column(CompressedText)
     author: Mapped[str | None]
     category: Mapped[str | None]
     comments: Mapped[str | None]
@@ -45,28 +104,199 @@ class Item(Base):
     guid: Mapped[str | None]
     pubDate: Mapped[str | None]
 
+
+class Item(ItemColumns, Base):
+    __tablename__ = "item"
+
+    feed: Mapped[Feed] = relationship()
+
     __table_args__ = (
-        UniqueConstraint("title", "feed_url"),
-        Index(None, "feed_url", "title"),
-        Index(None, "feed_url", "created_at", "predicted_label"),
+        UniqueConstraint("feed_id", "title_hash"),
+        Index(None, "feed_id", "created_at", "predicted_label"),
+        Index(None, "labeled_at"),
+    )
+
+
+class ItemArchive(ItemColumns, Base):
+    """Unlabeled items past the retention window, moved out of `item` by the
+    maintenance job but still consulted for deduplication. Their bodies are
+    dropped on the way, see `ARCHIVE_DROPPED`."""
+
+    __tablename__ = "item_archive"
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), nullable=False
+    )
+
+    __table_args__ = (UniqueConstraint("feed_id", "title_hash"),)
+
+
+class FetchState(Base):
+    __tablename__ = "fetch_state"
+    feed_hash: Mapped[str] = mapped_column(primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now(), nullable=False
     )
+    etag: Mapped[str | None]
+    last_modified: Mapped[str | None]
+    digest: Mapped[str | None]
+    ttl: Mapped[int | None]
+    skip_hours: Mapped[str | None]
+    next_due_at: Mapped[datetime | None] = mapped_column(DateTime)
 
 
-def get_item_by_feed_url_and_title(
-    session: Session, feed_url: str, title: str
-) -> Item | None:
-    stmt = select(Item).where(Item.title == title, Item.feed_url == feed_url)
-    return session.scalars(stmt).one_or_none()
+def get_or_create_feed_id(session: Session, url: str) -> int:
+    feed_id = session.scalars(select(Feed.id).where(Feed.url == url)).one_or_none()
+    if feed_id is None:
+        feed = Feed(url=url)
+        session.add(feed)
+        session.flush()
+        feed_id = feed.id
+    return feed_id
 
 
-def get_past_two_weeks_items_by_feed_url(
-    session: Session, feed_url: str, predicted_labels: list[Label] = []
-) -> Sequence[Item]:
-    conditions = [
-        Item.feed_url == feed_url,
-        Item.created_at >= arrow.utcnow().shift(weeks=-2).datetime,
+def set_feed_channel(session: Session, feed_id: int, channel: ParsedChannel) -> None:
+    session.execute(
+        update(Feed)
+        .where(Feed.id == feed_id)
+        .values(title=channel.title, link=channel.link, description=channel.description)
+    )
+
+
+def bump_feed_versions(session: Session, feed_ids: Iterable[int]) -> None:
+    session.execute(
+        update(Feed).where(Feed.id.in_(set(feed_ids))).values(version=Feed.version + 1)
+    )
+
+
+def get_existing_titles(
+    session: Session, feed_id: int, titles: list[str], chunk_size: int = 500
+) -> set[str]:
+    by_hash = {hash_title(title): title for title in titles}
+    hashes = list(by_hash)
+    existing: set[str] = set()
+    for i in range(0, len(hashes), chunk_size):
+        chunk = hashes[i : i + chunk_size]
+        stmt = union(
+            *[
+                select(table.title_hash).where(
+                    table.feed_id == feed_id, table.title_hash.in_(chunk)
+                )
+                for table in (Item, ItemArchive)
+            ]
+        )
+        existing.update(by_hash[title_hash] for title_hash in session.scalars(stmt))
+    return existing
+
+
+def insert_items(session: Session, rows: list[dict[str, Any]]) -> list[int]:
+    """Insert rows in one statement, skipping any whose (feed_id, title_hash)
+    is already stored, and return the ids of the rows actually inserted."""
+    if not rows:
+        return []
+    match session.get_bind().dialect.name:
+        case "postgresql":
+            stmt = postgresql.insert(Item)
+        case "sqlite":
+            stmt = sqlite.insert(Item)
+        case dialect:
+            raise NotImplementedError(f"Unsupported dialect {dialect}")
+    stmt = stmt.on_conflict_do_nothing(index_elements=["feed_id", "title_hash"])
+    return list(session.scalars(stmt.returning(Item.id), rows))
+
+
+def get_titles_by_ids(session: Session, ids: list[int]) -> dict[int, str]:
+    stmt = select(Item.id, Item.title).where(Item.id.in_(ids))
+    return {id: title for id, title in session.execute(stmt)}
+
+
+def get_recent_feed_rows(
+    session: Session,
+    feed_id: int,
+    since: datetime,
+    labels: list[Label] = [],
+    batch_size: int = 500,
+) -> Iterator[Row]:
+    """Rows of the columns a feed is rendered from, oldest first, streamed in
+    batches of `batch_size` instead of loading every ORM object. `label` is
+    the click label where there is one and the predicted label otherwise."""
+    label = func.coalesce(Item.label, Item.predicted_label)
+    conditions = [Item.feed_id == feed_id, Item.created_at >= since]
+    if labels:
+        conditions.append(label.in_(labels))
+    stmt = (
+        select(
+            Item.id,
+            Item.title,
+            label.label("label"),
+            Item.description,
+            Item.author,
+            Item.comments,
+            Item.enclosure,
+            Item.guid,
+            Item.pubDate,
+        )
+        .where(*conditions)
+        .order_by(Item.created_at)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from session.execute(stmt)
+
+
+def get_fetch_states(session: Session) -> dict[str, FetchState]:
+    return {state.feed_hash: state for state in session.scalars(select(FetchState))}
+
+
+def get_publish_times(
+    session: Session, feed_id: int, since: datetime
+) -> list[datetime]:
+    """Publish times of a feed's recent items, preferring `pubDate` over
+    `created_at` since the latter only records when the item was polled."""
+    stmt = select(Item.created_at, Item.pubDate).where(
+        Item.feed_id == feed_id, Item.created_at >= since
+    )
+    times = []
+    for created_at, pub_date in session.execute(stmt):
+        try:
+            published = parsedate_to_datetime(pub_date)
+            if published.tzinfo:
+                published = published.astimezone(timezone.utc).replace(tzinfo=None)
+            times.append(published)
+        except (TypeError, ValueError):
+            times.append(created_at)
+    return times
+
+
+# Item columns archived as NULL, deduplication only needs feed_id/title_hash
+# and dropping the bodies is what lets VACUUM shrink the database
+ARCHIVE_DROPPED = {
+    "description",
+    "author",
+    "category",
+    "comments",
+    "enclosure",
+    "guid",
+    "pubDate",
+}
+
+
+def archive_unlabeled_items(session: Session, before: datetime) -> int:
+    conditions = [Item.created_at < before, Item.label == None]
+    columns = [
+        null().label(column.key) if column.key in ARCHIVE_DROPPED else column
+        for column in Item.__table__.columns
     ]
-    if predicted_labels:
-        conditions.append(Item.predicted_label.in_(predicted_labels))
-    stmt = select(Item).where(*conditions).order_by(Item.created_at)
-    return session.scalars(stmt).all()
+    session.execute(
+        insert(ItemArchive).from_select(
+            Item.__table__.columns.keys(), select(*columns).where(*conditions)
+        )
+    )
+    return session.execute(delete(Item).where(*conditions)).rowcount
+
+
+def drop_unlabeled_descriptions(session: Session, before: datetime) -> int:
+    stmt = (
+        update(Item)
+        .where(Item.created_at < before, Item.label == None, Item.description != None)
+        .values(description=None)
+    )
+    return session.execute(stmt).rowcount
@@ -1,15 +1,35 @@
-from pathlib import Path
 from urllib.parse import urljoin
 
-from flask import redirect, send_from_directory
+from flask import redirect, request, send_from_directory
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from .lib.utils import hash_url, load_config
+from .lib.clicks import ClickQueue
+from .lib.feed_cache import FeedCache
+from .lib.render import ENCODINGS, FEEDS_PATH, etag_path
+from .lib.utils import config_provider, hash_url, load_config
 from .models import Item, Label
 
 
-def register_routes(app, engine):
+def register_routes(app, engine, clicks: ClickQueue, feed_cache: FeedCache | None):
+
+    def cached_feed(subpath: str):
+        config = load_config()
+        feed_config = config_provider.feed_by_hash(subpath)
+        entry = feed_cache.get(config, feed_config) if feed_config else None
+        if entry is None:
+            return None
+        encoding = request.accept_encodings.best_match(list(entry.encoded))
+        response = app.response_class(
+            entry.encoded[encoding] if encoding else entry.content,
+            mimetype="application/rss+xml",
+        )
+        response.set_etag(f"{entry.etag}-{encoding}" if encoding else entry.etag)
+        response.last_modified = entry.modified_at
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response.make_conditional(request)
 
     @app.route("/feeds", methods=["GET"])
     def feeds():
@@ -21,22 +41,40 @@ def register_routes(app, engine):
 
     @app.route("/feeds/<path:subpath>/<file>", methods=["GET"])
     def fetch(subpath, file):
-        basePath = Path("/")
-        return send_from_directory(basePath / "data" / "feeds" / subpath, file)
+        if file == "feed.xml" and feed_cache:
+            if (response := cached_feed(subpath)) is not None:
+                return response
+        directory = FEEDS_PATH / subpath
+        etag = etag_path(directory / file)
+        if not etag.is_file():
+            return send_from_directory(directory, file)
+        available = [
+            encoding
+            for encoding, suffix in ENCODINGS.items()
+            if (directory / (file + suffix)).is_file()
+        ]
+        encoding = request.accept_encodings.best_match(available)
+        # Each encoding is its own representation and gets its own strong ETag
+        response = send_from_directory(
+            directory,
+            file + ENCODINGS[encoding] if encoding else file,
+            mimetype="application/rss+xml",
+            etag=f"{etag.read_text()}-{encoding}" if encoding else etag.read_text(),
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
 
     @app.route("/update/<int:id>/<int:value>", methods=["GET"])
     def update(id, value):
+        label = Label(value)
         with Session(engine) as session:
-            try:
-                stmt = select(Item).where(Item.id == id)
-                item = session.scalars(stmt).one_or_none()
-                if not item:
-                    return f"Item with ID {id} does not exist", 404
-                item.label = Label(value)
-                session.commit()
-                if item.label is not Label.POOR:
-                    return redirect(item.link)
-                return "OK", 200
-            except:
-                session.rollback()
-                raise
+            stmt = select(Item.link).where(Item.id == id)
+            link = session.scalars(stmt).one_or_none()
+        if link is None:
+            return f"Item with ID {id} does not exist", 404
+        clicks.push(id, label)
+        if label is not Label.POOR:
+            return redirect(link)
+        return "OK", 200
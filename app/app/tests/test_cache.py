@@ -0,0 +1,33 @@
+import numpy as np
+from pandas import DataFrame
+
+from ..lib.cache import CachedClassifier, PredictionCache
+from ..lib.classifier import PROBA_COLUMNS, Classifier
+from ..lib.types import ClassifierConfig
+
+
+class Counting(Classifier):
+
+    def __init__(self, fingerprint: str) -> None:
+        super().__init__(ClassifierConfig())
+        self.fingerprint = fingerprint
+        self.seen: list[str] = []
+
+    def run(self, df):
+        self.seen.extend(df["title"])
+        proba = [[len(title), 0, 1] for title in df["title"]]
+        return DataFrame(proba, columns=PROBA_COLUMNS)
+
+
+def test_cached_classifier_runs_only_new_titles(tmp_path):
+    cache = PredictionCache(str(tmp_path / "predictions.db"), max_entries=2)
+    model = Counting("v1")
+    cached = CachedClassifier(model, cache)
+    first = cached.run(DataFrame({"title": ["one", "three"]}))
+    second = cached.run(DataFrame({"title": ["Three ", "four"]}))
+    assert model.seen == ["one", "three", "four"]
+    assert np.array_equal(second["proba_poor"], [5, 4])
+    assert np.array_equal(first["proba_poor"], [3, 5])
+    retrained = Counting("v2")
+    CachedClassifier(retrained, cache).run(DataFrame({"title": ["three"]}))
+    assert retrained.seen == ["three"]
@@ -0,0 +1,71 @@
+import fcntl
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from ..lib.clicks import ClickQueue
+from ..models import Base, Item, Label, get_or_create_feed_id, hash_title, insert_items
+
+
+def test_click_queue_drains_latest_label(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lss.db'}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        feed_id = get_or_create_feed_id(session, "https://example.com/rss")
+        row = dict(feed_id=feed_id, title_hash=hash_title("one"), title="one", link="")
+        [id] = insert_items(session, [row])
+        session.commit()
+    clicks = ClickQueue(str(tmp_path / "clicks.db"))
+    clicks.push(id, Label.AVERAGE)
+    clicks.push(id, Label.GOOD)
+    clicks.push(id + 1, Label.POOR)
+    assert clicks.drain(engine) == 3
+    assert clicks.drain(engine) == 0
+    with Session(engine) as session:
+        assert session.scalars(select(Item.label)).one() is Label.GOOD
+
+
+def test_push_does_not_wait_on_a_locked_database(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'lss.db'}", connect_args={"timeout": 2}
+    )
+    Base.metadata.create_all(bind=engine)
+    clicks = ClickQueue(str(tmp_path / "clicks.db"))
+    clicks.push(1, Label.GOOD)
+    with closing(sqlite3.connect(tmp_path / "lss.db")) as writer:
+        writer.execute("BEGIN EXCLUSIVE")
+        errors = []
+
+        def drain():
+            try:
+                clicks.drain(engine)
+            except OperationalError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=drain)
+        thread.start()
+        time.sleep(0.2)
+        start = time.monotonic()
+        clicks.push(1, Label.POOR)
+        assert time.monotonic() - start < 0.5
+        thread.join()
+        writer.rollback()
+    assert len(errors) == 1
+    assert clicks.drain(engine) == 2
+
+
+def test_drain_skips_while_another_worker_drains(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lss.db'}")
+    Base.metadata.create_all(bind=engine)
+    clicks = ClickQueue(str(tmp_path / "clicks.db"))
+    clicks.push(1, Label.GOOD)
+    with open(tmp_path / "clicks.db.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        assert clicks.drain(engine) == 0
+        clicks.push(1, Label.POOR)
+    assert clicks.drain(engine) == 2
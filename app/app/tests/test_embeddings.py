@@ -0,0 +1,16 @@
+import numpy as np
+
+from ..lib.embeddings import EmbeddingStore
+
+
+def test_store_grows_and_resets_on_new_encoder(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "encoder-a", dim=4)
+    vectors, found = store.get([1, 2])
+    assert not found.any()
+    store.put([3, 1], np.array([[1, 2, 3, 4], [5, 6, 7, 8]], dtype=np.float32))
+    vectors, found = store.get([1, 2, 3, 10])
+    assert found.tolist() == [True, False, True, False]
+    assert vectors[0].tolist() == [5, 6, 7, 8]
+    assert store.rows == 4
+    store = EmbeddingStore(str(tmp_path), "encoder-b", dim=4)
+    assert store.rows == 0
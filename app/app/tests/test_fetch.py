@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+from functools import partial
+
+import httpx
+
+from ..lib.fetch import fetch_feed, fetch_feeds
+from ..lib.types import FeedConfig, FetchConfig
+from ..models import FetchState
+from .test_parser import FEED
+
+DIGEST = hashlib.sha256(FEED).hexdigest()
+
+
+def fetch(state: FetchState | None, response: httpx.Response):
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return response
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await fetch_feed(
+                client,
+                FeedConfig(url="https://example.com/rss"),
+                state,
+                asyncio.Semaphore(1),
+                asyncio.Semaphore(1),
+                timeout=5,
+            )
+
+    return asyncio.run(run()), requests
+
+
+def test_fetch_feed_parses_new_content():
+    headers = {"ETag": '"v2"', "Last-Modified": "Tue, 01 Oct 2024 00:00:00 GMT"}
+    result, [request] = fetch(None, httpx.Response(200, headers=headers, content=FEED))
+    assert "If-None-Match" not in request.headers
+    assert result.parser and result.channel.title == "Example"
+    assert (result.etag, result.digest) == ('"v2"', DIGEST)
+    assert not result.failed
+
+
+def test_fetch_feed_short_circuits_unchanged_feeds():
+    state = FetchState(
+        etag='"v1"', last_modified="Mon, 30 Sep 2024 00:00:00 GMT", digest=DIGEST
+    )
+    result, [request] = fetch(state, httpx.Response(304))
+    assert request.headers["If-None-Match"] == '"v1"'
+    assert request.headers["If-Modified-Since"] == "Mon, 30 Sep 2024 00:00:00 GMT"
+    assert result.parser is None and not result.failed
+    assert (result.etag, result.digest) == ('"v1"', DIGEST)
+    # A server ignoring the conditional headers but serving the same bytes
+    result, _ = fetch(state, httpx.Response(200, content=FEED))
+    assert result.parser is None and not result.failed
+    assert (result.etag, result.digest) == ('"v1"', DIGEST)
+    # The same bytes under rotated validators, which the next poll sends
+    headers = {"ETag": '"v3"', "Last-Modified": "Wed, 02 Oct 2024 00:00:00 GMT"}
+    result, _ = fetch(state, httpx.Response(200, headers=headers, content=FEED))
+    assert result.parser is None and not result.failed
+    assert (result.etag, result.digest) == ('"v3"', DIGEST)
+    assert result.last_modified == "Wed, 02 Oct 2024 00:00:00 GMT"
+
+
+def test_fetch_feed_fails_on_error_status():
+    for status in (404, 503):
+        response = httpx.Response(status, headers={"Retry-After": "120"})
+        result, _ = fetch(FetchState(digest=DIGEST), response)
+        assert result.failed and result.parser is None
+        assert result.retry_after == 120
+
+
+def test_slow_host_does_not_hold_up_other_hosts(monkeypatch):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow.example.com":
+            await asyncio.sleep(0.5)
+        return httpx.Response(200, content=FEED)
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(
+        httpx, "AsyncClient", partial(httpx.AsyncClient, transport=transport)
+    )
+    feeds = [FeedConfig(url=f"https://slow.example.com/{i}") for i in range(12)]
+    feeds.append(FeedConfig(url="https://fast.example.com/rss"))
+    config = FetchConfig(max_connections=8, max_connections_per_host=2)
+
+    async def run():
+        queue = asyncio.Queue()
+        start = asyncio.get_running_loop().time()
+        task = asyncio.create_task(fetch_feeds(feeds, {}, config, queue))
+        first = await queue.get()
+        elapsed = asyncio.get_running_loop().time() - start
+        return first, elapsed, await task
+
+    first, elapsed, results = asyncio.run(run())
+    assert first.feed.url == "https://fast.example.com/rss"
+    assert elapsed < 0.4
+    assert [result.feed for result in results] == feeds
+    assert not any(result.failed for result in results)
@@ -0,0 +1,130 @@
+import numpy as np
+from pandas import DataFrame
+
+from ..jobs.generate import WarmResources, add_predictions, score_feeds
+from ..lib.classifier import PROBA_COLUMNS, Classifier
+from ..lib.fetch import FetchResult
+from ..lib.registry import REGISTRY
+from ..lib.types import (
+    CascadeConfig,
+    ClassifierConfig,
+    Config,
+    FeedConfig,
+    PredictionCacheConfig,
+)
+from ..models import Label
+
+
+class Stub(Classifier):
+    """Returns fixed probabilities by title, failing on titles in `fail_on`."""
+
+    def __init__(self, proba, weight=1, cost=1, fail_on=()) -> None:
+        super().__init__(ClassifierConfig(weight=weight, cost=cost))
+        self.proba = proba
+        self.fail_on = set(fail_on)
+        self.seen: list[str] = []
+
+    def run(self, df):
+        if self.fail_on & set(df["title"]):
+            raise RuntimeError("Cannot score")
+        self.seen.extend(df["title"])
+        return DataFrame([self.proba[t] for t in df["title"]], columns=PROBA_COLUMNS)
+
+
+class Cheap(Stub):
+    pass
+
+
+class Expensive(Stub):
+    pass
+
+
+def models() -> tuple[Cheap, Expensive]:
+    cheap = Cheap({"sure": [0, 0, 1], "unsure": [0.3, 0.3, 0.4]}, cost=1)
+    expensive = Expensive(
+        {"sure": [0, 1, 0], "unsure": [0.8, 0.1, 0.1]}, weight=3, cost=100
+    )
+    return cheap, expensive
+
+
+def test_cascade_sends_only_uncertain_items_to_expensive_models():
+    cheap, expensive = models()
+    df = DataFrame({"title": ["sure", "unsure"]})
+    cascade = CascadeConfig(active=True, threshold=0.5)
+    df = add_predictions(df, [expensive, cheap], cascade)
+    assert cheap.seen == ["sure", "unsure"]
+    assert expensive.seen == ["unsure"]
+    assert df["decided_by"].tolist() == ["Cheap", "Expensive"]
+    # Weighted mean over the models that ran on each item
+    assert np.allclose(df[PROBA_COLUMNS], [[0, 0, 1], [0.675, 0.15, 0.175]])
+    assert np.allclose(df["margin"], [1, 0.5])
+    assert df["predicted_label"].tolist() == [Label.GOOD, Label.POOR]
+
+
+def test_ensemble_runs_every_model_without_cascade():
+    cheap, expensive = models()
+    df = add_predictions(DataFrame({"title": ["sure", "unsure"]}), [cheap, expensive])
+    assert expensive.seen == ["sure", "unsure"]
+    assert df["decided_by"].tolist() == ["Expensive", "Expensive"]
+    assert np.allclose(df[PROBA_COLUMNS], [[0, 0.75, 0.25], [0.675, 0.15, 0.175]])
+    assert np.allclose(df["margin"], [0.5, 0.5])
+    assert df["predicted_label"].tolist() == [Label.AVERAGE, Label.POOR]
+
+
+def feed(url: str, *titles: str) -> tuple[FetchResult, DataFrame]:
+    result = FetchResult(feed=FeedConfig(url=url))
+    return result, DataFrame({"title": list(titles), "link": ""})
+
+
+def test_score_feeds_skips_only_the_failing_feed():
+    config = Config(host="", db_url="", feeds=[], classifiers={})
+    proba = dict.fromkeys(["one", "two", "three"], [0.1, 0.2, 0.7])
+    model = Stub(proba, fail_on={"bad"})
+    batch = [feed("a", "one", "two"), feed("b", "bad"), feed("c", "three")]
+    scored = score_feeds(config, [model], None, batch)
+    assert [result.feed.url for result, _ in scored] == ["a", "c"]
+    assert model.seen == ["one", "two", "three"]
+    assert scored[0][1]["predicted_label"].tolist() == [Label.GOOD] * 2
+    assert score_feeds(config, [model], None, [feed("b", "bad")]) == []
+
+
+class Loaded(Stub):
+    loads = 0
+
+    def __init__(self, config: ClassifierConfig) -> None:
+        super().__init__({})
+        type(self).loads += 1
+
+
+class First(Loaded):
+    pass
+
+
+class Second(Loaded):
+    pass
+
+
+def test_warm_resources_reload_only_retrained_classifiers(tmp_path, monkeypatch):
+    for cls in (First, Second):
+        path = tmp_path / cls.__name__
+        path.write_text("v1")
+        monkeypatch.setattr(cls, "artifacts", (str(path),))
+        monkeypatch.setitem(REGISTRY, cls.__name__, f"{__name__}:{cls.__name__}")
+    config = Config(
+        host="",
+        db_url="",
+        feeds=[],
+        classifiers={"First": ClassifierConfig(), "Second": ClassifierConfig()},
+        prediction_cache=PredictionCacheConfig(active=False),
+    )
+    warm = WarmResources()
+    warm.refresh(config)
+    warm.refresh(config)
+    assert [model.name for model in warm.models] == ["First", "Second"]
+    assert (First.loads, Second.loads) == (1, 1)
+    (tmp_path / "First").write_text("v2 retrained")
+    warm.refresh(config)
+    assert First.loads == 1
+    warm.refresh(config)
+    warm.refresh(config)
+    assert (First.loads, Second.loads) == (2, 1)
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from ..compression import compress, decompress
+from ..models import (
+    ARCHIVE_DROPPED,
+    Base,
+    Item,
+    ItemArchive,
+    Label,
+    archive_unlabeled_items,
+    get_existing_titles,
+    get_or_create_feed_id,
+    hash_title,
+    insert_items,
+)
+
+engine = create_engine("sqlite://")
+Base.metadata.create_all(bind=engine)
+
+
+def row(feed_id: int, title: str, **kwargs):
+    return (
+        dict(feed_id=feed_id, title_hash=hash_title(title), title=title, link="link")
+        | kwargs
+    )
+
+
+def test_insert_items_skips_conflicts():
+    with Session(engine) as session:
+        feed_id = get_or_create_feed_id(session, "https://example.com/rss")
+        assert get_or_create_feed_id(session, "https://example.com/rss") == feed_id
+        rows = [row(feed_id, "one", predicted_label=Label.GOOD), row(feed_id, "two")]
+        assert len(insert_items(session, rows)) == 2
+        rows = [row(feed_id, "one", link="other"), row(feed_id, "three")]
+        assert len(insert_items(session, rows)) == 1
+        session.commit()
+        titles = get_existing_titles(session, feed_id, ["one", "three", "four"])
+        assert titles == {"one", "three"}
+
+
+def test_compressed_description_roundtrip():
+    description = "<p>Article URL: <a href='https://example.com'>Link</a></p>" * 4
+    assert len(compress(description)) < len(description) / 4
+    assert decompress(compress(description)) == description
+    with Session(engine) as session:
+        feed_id = get_or_create_feed_id(session, "https://example.com/rss")
+        insert_items(session, [row(feed_id, "four", description=description)])
+        stmt = select(Item.description).where(Item.title == "four")
+        assert session.scalars(stmt).one() == description
+
+
+def test_archive_unlabeled_items():
+    now = datetime(2024, 10, 1)
+    with Session(engine) as session:
+        feed_id = get_or_create_feed_id(session, "https://example.com/archive")
+        old = now - timedelta(days=60)
+        description = "<p>Old and unlabeled</p>" * 8
+        insert_items(
+            session,
+            [
+                row(
+                    feed_id,
+                    "stale",
+                    created_at=old,
+                    description=description,
+                    author="author",
+                    guid="guid",
+                ),
+                row(feed_id, "labeled", created_at=old, label=Label.GOOD),
+                row(feed_id, "recent", created_at=now),
+            ],
+        )
+        session.commit()
+        columns = Item.__table__.columns.keys()
+        stmt = select(Item.__table__).where(Item.title == "stale")
+        stale = session.execute(stmt).one()._asdict()
+        assert archive_unlabeled_items(session, now - timedelta(days=30)) == 1
+        session.commit()
+        stmt = select(Item.title).where(Item.feed_id == feed_id)
+        assert sorted(session.scalars(stmt)) == ["labeled", "recent"]
+        archived = session.scalars(select(ItemArchive)).one()
+        assert {column: getattr(archived, column) for column in columns} == {
+            column: None if column in ARCHIVE_DROPPED else value
+            for column, value in stale.items()
+        }
+        assert archived.description is None and archived.title == "stale"
+        titles = get_existing_titles(session, feed_id, ["stale", "labeled", "new"])
+        assert titles == {"stale", "labeled"}
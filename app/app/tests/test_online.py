@@ -0,0 +1,29 @@
+import joblib
+import numpy as np
+import pytest
+
+from ..lib import online
+from ..lib.online import Checkpoint, HashingSGD
+from ..lib.types import ClassifierConfig
+
+
+def test_checkpoint_learns_incrementally():
+    checkpoint = Checkpoint.new()
+    checkpoint.partial_fit(
+        ["stocks fall", "cat video", "rust release"], np.array([0, 1, 2])
+    )
+    checkpoint.partial_fit(["rust compiler release"] * 5, np.array([2] * 5))
+    assert checkpoint.counts.tolist() == [1, 1, 6]
+    proba = checkpoint.model.predict_proba(
+        checkpoint.vectorizer.transform(["new rust release"])
+    )
+    assert proba.shape == (1, 3)
+    assert proba.argmax() == 2
+
+
+def test_unfitted_checkpoint_is_not_loaded(tmp_path, monkeypatch):
+    path = tmp_path / "hashing-sgd.joblib"
+    joblib.dump(Checkpoint.new(), path)
+    monkeypatch.setattr(online, "ONLINE_PATH", str(path))
+    with pytest.raises(ValueError):
+        HashingSGD(ClassifierConfig())
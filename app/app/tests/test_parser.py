@@ -0,0 +1,40 @@
+from ..lib.parser import FeedParser
+
+FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+  <channel>
+    <title>Example</title>
+    <link>https://example.com</link>
+    <description>Example feed</description>
+    <item>
+      <title>First</title>
+      <link>https://example.com/1</link>
+      <guid isPermaLink="false">1</guid>
+      <enclosure url="https://example.com/1.mp3" type="audio/mpeg" />
+    </item>
+    <item>
+      <title>No link</title>
+    </item>
+    <item>
+      <title>Second</title>
+      <link>https://example.com/2</link>
+    </item>
+  </channel>
+</rss>
+"""
+
+
+def test_feed_parser_items():
+    parser = FeedParser(FEED, chunk_size=64)
+    assert parser.channel.title == "Example"
+    items = list(parser.items())
+    assert [item.title for item in items] == ["First", "Second"]
+    assert items[0].guid == "1"
+    assert items[0].enclosure == "https://example.com/1.mp3"
+
+
+def test_feed_parser_stops_early():
+    parser = FeedParser(FEED, chunk_size=64)
+    first = next(parser.items())
+    assert first.title == "First"
+    assert parser._offset < len(FEED)
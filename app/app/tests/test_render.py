@@ -0,0 +1,69 @@
+import gzip
+import xml.etree.ElementTree as ET
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from ..lib.clicks import apply_labels
+from ..lib.feed_cache import FeedCache
+from ..lib.render import write_feed
+from ..lib.types import Config, FeedConfig, ParsedChannel
+from ..models import (
+    Base,
+    Label,
+    get_or_create_feed_id,
+    hash_title,
+    insert_items,
+    set_feed_channel,
+)
+
+channel = ParsedChannel(title="Feed", link="https://example.com", description="A & B")
+
+
+def test_write_feed_replaces_only_on_change(tmp_path):
+    path = tmp_path / "feed" / "feed.xml"
+    items = [{"title": "<One>", "link": "https://example.com/1", "author": None}]
+    assert write_feed(path, channel, iter(items))
+    root = ET.parse(path).getroot()
+    assert root.find("channel/description").text == "A & B"
+    assert root.find("channel/item/title").text == "<One>"
+    assert root.find("channel/item/author") is None
+    mtime = path.stat().st_mtime_ns
+    assert not write_feed(path, channel, iter(items))
+    assert path.stat().st_mtime_ns == mtime
+    assert write_feed(path, channel, iter(items * 2))
+    assert len(ET.parse(path).getroot().findall("channel/item")) == 2
+    assert sorted(p.name for p in path.parent.iterdir()) == [
+        "feed.xml",
+        "feed.xml.br",
+        "feed.xml.etag",
+        "feed.xml.gz",
+    ]
+    assert gzip.decompress((path.parent / "feed.xml.gz").read_bytes()) == (
+        path.read_bytes()
+    )
+
+
+def test_feed_cache_rerenders_on_version_bump(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lss.db'}")
+    Base.metadata.create_all(bind=engine)
+    feed_config = FeedConfig(url="https://example.com/rss", filter=True)
+    config = Config(host="https://lss", db_url="", feeds=[feed_config], classifiers={})
+    with Session(engine) as session:
+        feed_id = get_or_create_feed_id(session, feed_config.url)
+        set_feed_channel(session, feed_id, channel)
+        rows = [
+            dict(feed_id=feed_id, title_hash=hash_title(title), title=title, link="")
+            | dict(predicted_label=Label.GOOD)
+            for title in ("one", "two")
+        ]
+        ids = insert_items(session, rows)
+        session.commit()
+    cache = FeedCache(engine, max_entries=2, max_age=60)
+    first = cache.get(config, feed_config)
+    assert first.content.count(b"<item>") == 2
+    assert cache.get(config, feed_config) is first
+    apply_labels(engine, {ids[0]: Label.POOR})
+    second = cache.get(config, feed_config)
+    assert second.content.count(b"<item>") == 1
+    assert gzip.decompress(second.encoded["gzip"]) == second.content
@@ -0,0 +1,81 @@
+import gzip
+
+import brotli
+import pytest
+import yaml
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from .. import routes
+from ..lib.clicks import ClickQueue
+from ..lib.feed_cache import FeedCache
+from ..lib.render import write_feed
+from ..lib.utils import ConfigProvider, hash_url
+from ..models import (
+    Base,
+    Label,
+    get_or_create_feed_id,
+    hash_title,
+    insert_items,
+    set_feed_channel,
+)
+from .test_render import channel
+
+URL = "https://example.com/rss"
+PATH = f"/feeds/{hash_url(URL)}/feed.xml"
+
+
+@pytest.fixture(params=["static", "cached"])
+def client(request, tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lss.db'}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        feed_id = get_or_create_feed_id(session, URL)
+        set_feed_channel(session, feed_id, channel)
+        row = dict(feed_id=feed_id, title_hash=hash_title("one"), title="one")
+        insert_items(session, [row | dict(link="", predicted_label=Label.GOOD)])
+        session.commit()
+    items = [{"title": "one", "link": "https://example.com/1"}]
+    write_feed(tmp_path / "feeds" / hash_url(URL) / "feed.xml", channel, iter(items))
+    monkeypatch.setattr(routes, "FEEDS_PATH", tmp_path / "feeds")
+    config = dict(host="https://lss", db_url="", feeds=[dict(url=URL)], classifiers={})
+    (tmp_path / "config.yml").write_text(yaml.safe_dump(config))
+    provider = ConfigProvider(str(tmp_path / "config.yml"))
+    monkeypatch.setattr(routes, "config_provider", provider)
+    monkeypatch.setattr(routes, "load_config", provider.get)
+    feed_cache = FeedCache(engine, 2, 60) if request.param == "cached" else None
+    app = Flask(__name__)
+    routes.register_routes(
+        app, engine, ClickQueue(str(tmp_path / "clicks.db")), feed_cache
+    )
+    return app.test_client()
+
+
+def test_feed_encoding_negotiation(client):
+    identity = client.get(PATH, headers={"Accept-Encoding": "identity"})
+    assert identity.status_code == 200
+    assert "Content-Encoding" not in identity.headers
+    assert identity.data.count(b"<item>") == 1
+    assert "Accept-Encoding" in identity.headers["Vary"]
+    etag = identity.headers["ETag"].strip('"')
+    br = client.get(PATH, headers={"Accept-Encoding": "gzip, br"})
+    assert br.headers["Content-Encoding"] == "br"
+    assert br.headers["ETag"] == f'"{etag}-br"'
+    assert brotli.decompress(br.data) == identity.data
+    gz = client.get(PATH, headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["Content-Encoding"] == "gzip"
+    assert gz.headers["ETag"] == f'"{etag}-gzip"'
+    assert gzip.decompress(gz.data) == identity.data
+
+
+def test_feed_conditional_requests(client):
+    first = client.get(PATH, headers={"Accept-Encoding": "br"})
+    etag, modified = first.headers["ETag"], first.headers["Last-Modified"]
+    headers = {"Accept-Encoding": "br", "If-None-Match": etag}
+    assert client.get(PATH, headers=headers).status_code == 304
+    # Another encoding is another representation
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": etag}
+    assert client.get(PATH, headers=headers).status_code == 200
+    headers = {"Accept-Encoding": "br", "If-Modified-Since": modified}
+    assert client.get(PATH, headers=headers).status_code == 304
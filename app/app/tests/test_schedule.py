@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+
+from ..lib.schedule import next_poll_at, poll_interval
+from ..lib.types import ScheduleConfig
+
+cfg = ScheduleConfig()
+now = datetime(2026, 1, 1, 12)
+
+
+def test_poll_interval_tracks_publish_rate():
+    hourly = [now - timedelta(hours=i) for i in range(1, 49)]
+    assert poll_interval(now, hourly, cfg) == timedelta(minutes=30)
+    assert poll_interval(now, [], cfg) == timedelta(minutes=cfg.max_interval)
+    burst = [now - timedelta(seconds=i) for i in range(100)]
+    assert poll_interval(now, burst, cfg) == timedelta(minutes=cfg.min_interval)
+
+
+def test_next_poll_at_honours_feed_and_server_hints():
+    hourly = [now - timedelta(hours=i) for i in range(1, 49)]
+    assert next_poll_at(now, hourly, cfg, ttl=120) == now + timedelta(hours=2)
+    assert next_poll_at(now, hourly, cfg, retry_after=3600) == now + timedelta(hours=1)
+    assert next_poll_at(now, hourly, cfg, skip_hours={12, 13}) == datetime(
+        2026, 1, 1, 14
+    )
@@ -0,0 +1,23 @@
+from ..lib.utils import ConfigProvider
+
+CONFIG = """
+host: https://example.com
+db_url: sqlite://
+feeds:
+  - url: https://example.com/rss
+classifiers: {}
+"""
+
+
+def test_config_provider_reloads_on_change(tmp_path):
+    path = tmp_path / "config.yml"
+    path.write_text(CONFIG)
+    provider = ConfigProvider(str(path))
+    config = provider.get()
+    assert provider.get() is config
+    assert provider.feed_by_hash("FXpyotMB").url == "https://example.com/rss"
+    path.write_text(CONFIG.replace("example.com/rss", "example.org/feed"))
+    assert provider.get().feeds[0].url == "https://example.org/feed"
+    assert provider.feed_by_hash("FXpyotMB") is None
+    path.write_text(CONFIG + "feeds: [")
+    assert provider.get().feeds[0].url == "https://example.org/feed"
@@ -1,6 +1,8 @@
 from flask import Flask
 from sqlalchemy import create_engine
 
+from app.lib.clicks import ClickQueue, start_flusher
+from app.lib.feed_cache import FeedCache
 from app.lib.utils import load_config
 
 from .models import Base
@@ -10,7 +12,14 @@ app = Flask(__name__)
 config = load_config()
 engine = create_engine(config.db_url)
 Base.metadata.create_all(bind=engine)
-register_routes(app, engine)
+clicks = ClickQueue(config.clicks.path)
+start_flusher(clicks, engine, config.clicks.flush_interval, config.clicks.batch_size)
+feed_cache = (
+    FeedCache(engine, config.feed_cache.max_entries, config.feed_cache.max_age)
+    if config.feed_cache.active
+    else None
+)
+register_routes(app, engine, clicks, feed_cache)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=80)
@@ -22,4 +22,9 @@ fi
 
 crontab /config/crontab
 cron
+
+if [ "$1" = "daemon" ]; then
+  poetry run generate-daemon &
+fi
+
 exec poetry run gunicorn -w 4 -b 0.0.0.0:80 app.wsgi:app